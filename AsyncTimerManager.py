@@ -0,0 +1,64 @@
+import asyncio
+
+from TimerManager import TimerManager
+
+
+class AsyncTimerManager(TimerManager):
+    """
+    TimerManager driven by an asyncio event loop instead of a thread of its own.
+
+    The earliest deadline is armed with a single loop.call_at handle. Commands from other
+    threads, such as key presses from the InputHub's dispatch thread, wake the loop with
+    call_soon_threadsafe, so timers, their status sinks and wait_triggered futures are only
+    ever touched on the loop. Sounds and notifications still go to the audio engine and
+    notifier workers, so a tick never blocks on a device; the tick itself does run on the
+    loop, so this mode suits the modest timer counts of the UI.
+    """
+
+    def __init__(self, input_hub=None, clock=None):
+        super().__init__(input_hub, clock)
+        self.loop = None
+        self._handle = None
+        self._wake_scheduled = False
+
+    def start(self, loop=None):
+        """Start scheduling on loop, by default the running one."""
+        self.loop = loop or asyncio.get_running_loop()
+        self.running = True
+        self._wake()
+
+    def run(self):
+        raise RuntimeError("AsyncTimerManager runs on an event loop; call start() from it instead")
+
+    def stop(self):
+        self.running = False
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._disarm)
+
+    def _wake(self):
+        # Commands queued before start() are applied by the step start() schedules
+        if self.loop is None or self._wake_scheduled:
+            return
+        self._wake_scheduled = True
+        self.loop.call_soon_threadsafe(self._step)
+
+    def _step(self):
+        # Cleared before applying, so a command queued from now on schedules another step
+        self._wake_scheduled = False
+        if not self.running:
+            return
+        self.wakeups += 1
+        self.step()
+        self._arm()
+
+    def _arm(self):
+        self._disarm()
+        self.parked = not self._heap
+        if self.running and self._heap:
+            when = self.loop.time() + (self._heap[0][0] - self.clock.monotonic())
+            self._handle = self.loop.call_at(when, self._step)
+
+    def _disarm(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
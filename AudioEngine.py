@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from Profiler import profiler
+
+_mixer_lock = threading.Lock()
+
+
+def get_mixer():
+    """Import and initialise pygame's mixer the first time a sound is needed."""
+    with _mixer_lock:
+        import pygame
+
+        if pygame.mixer.get_init() is None:
+            pygame.mixer.init()
+        return pygame.mixer
+
+
+class AudioEngine:
+    """
+    Plays sounds on a dedicated worker thread so the scheduler never blocks on audio.
+
+    Requests are queued with play() and assigned to a fixed pool of mixer channels. When
+    every channel is busy, a request takes over the channel playing the lowest priority
+    sound if that is below its own priority; otherwise it is dropped and counted. The same
+    sound requested again within coalesce_window seconds is merged into the play already
+    started.
+
+    Sounds too long to decode (PcmCache's StreamedSound) are played from their file
+    through mixer.music instead, which has a single stream; a new one replaces the last.
+    """
+
+    def __init__(self, channels=16, coalesce_window=0.05, max_queue=256, mixer=None):
+        self.channels = channels
+        self.coalesce_window = coalesce_window
+        self.requests = queue.Queue(maxsize=max_queue)
+        self._mixer = mixer
+        self._channel_priority = [0] * channels
+        # Sound -> when it last started, for plays within coalesce_window
+        self._last_played = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.played = 0
+        self.dropped = 0
+        self.coalesced = 0
+        # Seconds from trigger to the sound being handed to its channel
+        self.latencies = deque(maxlen=1024)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            if self._mixer is None:
+                self._mixer = get_mixer()
+            self._mixer.set_num_channels(self.channels)
+            self._thread = threading.Thread(target=self._run, name='audio-engine', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.requests.put(None)
+            self._thread = None
+
+    def play(self, sound, volume=1.0, priority=0, triggered_at=None):
+        """Queue a sound without blocking; returns False if it had to be dropped."""
+        if self._thread is None:
+            self.start()
+        if triggered_at is None:
+            triggered_at = time.monotonic()
+        try:
+            self.requests.put_nowait((triggered_at, sound, volume, priority))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            'queue_depth': self.requests.qsize(),
+            'played': self.played,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'latency_p50': _percentile(latencies, 50),
+            'latency_p99': _percentile(latencies, 99),
+            'latency_max': latencies[-1] if latencies else None,
+        }
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            started = time.perf_counter() if profiler.active else None
+            self._play(*request)
+            if started is not None:
+                profiler.add_span('play_sound', started)
+
+    def _play(self, triggered_at, sound, volume, priority):
+        now = time.monotonic()
+        last = self._last_played.get(sound)
+        if last is not None and now - last < self.coalesce_window:
+            self.coalesced += 1
+            return
+        # Only plays inside the window matter; dropping the rest keeps sounds the
+        # SoundCache has evicted from being held here
+        if self._last_played:
+            self._last_played = {played: when for played, when in self._last_played.items()
+                                 if now - when < self.coalesce_window}
+
+        if getattr(sound, 'streamed', False):
+            self._play_stream(sound, volume)
+            self._last_played[sound] = now
+            self.played += 1
+            self.latencies.append(time.monotonic() - triggered_at)
+            return
+
+        index = self._find_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return
+
+        channel = self._mixer.Channel(index)
+        channel.play(sound)
+        channel.set_volume(volume)
+        self._channel_priority[index] = priority
+        self._last_played[sound] = now
+        self.played += 1
+        self.latencies.append(time.monotonic() - triggered_at)
+
+    def _play_stream(self, sound, volume):
+        music = self._mixer.music
+        music.load(sound.path)
+        music.set_volume(volume)
+        music.play()
+
+    def _find_channel(self, priority):
+        victim = None
+        for index in range(self.channels):
+            channel = self._mixer.Channel(index)
+            if not channel.get_busy():
+                return index
+            if self._channel_priority[index] < priority and \
+                    (victim is None or self._channel_priority[index] < self._channel_priority[victim]):
+                victim = index
+        if victim is not None:
+            self._mixer.Channel(victim).stop()
+        return victim
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+# Shared by every timer in the process
+audio_engine = AudioEngine()
@@ -0,0 +1,35 @@
+import time
+
+
+class SystemClock:
+    """The real monotonic clock, which the engine uses unless it is given another."""
+
+    __slots__ = ()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class VirtualClock:
+    """
+    A clock that only moves when told to, for simulating schedules faster than real time.
+
+    Nothing sleeps on it: whoever drives the simulation advances it straight to the next
+    thing that should happen (see Simulation).
+    """
+
+    __slots__ = ('now',)
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def monotonic(self):
+        return self.now
+
+    def advance_to(self, when):
+        if when > self.now:
+            self.now = when
+
+
+# Shared default for timers and managers
+system_clock = SystemClock()
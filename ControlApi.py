@@ -0,0 +1,170 @@
+import asyncio
+import json
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field
+
+
+class TimerIds(BaseModel):
+    ids: List[str]
+
+
+class TimerSpec(BaseModel):
+    name: str = "Generic"
+    interval: float = Field(gt=0)
+    key: Optional[str] = None
+    file_path: Optional[str] = None
+    volume: float = 1.0
+    group: str = ""
+    trim_sound: bool = False
+    catch_up: Literal['skip', 'burst', 'coalesce'] = 'skip'
+    enabled: bool = False
+
+
+class NewTimers(BaseModel):
+    timers: List[TimerSpec]
+
+
+class ControlApi:
+    """
+    Local HTTP and WebSocket control of the timers, mounted on the NiceGUI/FastAPI app.
+
+        GET  /api/timers           state of every timer
+        POST /api/timers           {"timers": [{"name", "interval", ...}]} creates timers
+        POST /api/timers/reset     {"ids": [...]} resets running timers
+        POST /api/timers/enable    {"ids": [...]}
+        POST /api/timers/disable   {"ids": [...]}
+        WS   /api/stream           state deltas
+
+    Ids are the timers' saved uids. Reset, enable and disable only queue the ids and
+    return; everything queued within one tick is applied together, so a burst of
+    requests costs one batch call per kind and an id repeated in the burst counts once.
+    For the same id, the last of enable and disable in a tick wins.
+
+    The stream sends {"full": rows} on connect and then {"d": rows, "r": ids} every
+    stream_interval while something changed, where a row is [id, seconds left or None,
+    triggered 0/1] and "r" lists removed timers.
+
+    The controller does the actual work on the event loop; it needs reset(ids),
+    async enable(ids), disable(ids), create(specs) returning the new ids, and states()
+    returning {id: (seconds left or None, triggered)}.
+    """
+
+    def __init__(self, controller, tick=0.05, stream_interval=0.25):
+        self.controller = controller
+        self.tick = tick
+        self.stream_interval = stream_interval
+        self._resets = set()
+        self._enabled = {}
+        self._flush_task = None
+        self._subscribers = set()
+        self._stream_task = None
+        self._last_states = None
+        # Ids received and batches applied, to see how well bursts coalesce
+        self.commands = 0
+        self.flushes = 0
+
+    def mount(self, app, prefix='/api'):
+        router = APIRouter(prefix=prefix)
+        router.add_api_route('/timers', self.list_timers, methods=['GET'])
+        router.add_api_route('/timers', self.create, methods=['POST'])
+        router.add_api_route('/timers/reset', self.reset, methods=['POST'])
+        router.add_api_route('/timers/enable', self.enable, methods=['POST'])
+        router.add_api_route('/timers/disable', self.disable, methods=['POST'])
+        router.add_api_websocket_route('/stream', self.stream)
+        app.include_router(router)
+
+    async def list_timers(self):
+        return {'timers': _rows(self.controller.states())}
+
+    async def create(self, request: NewTimers):
+        ids = self.controller.create(request.timers)
+        enable = [timer_id for timer_id, spec in zip(ids, request.timers) if spec.enabled]
+        if enable:
+            self._queue_states(enable, True)
+        return {'ids': ids}
+
+    async def reset(self, request: TimerIds):
+        self._resets.update(request.ids)
+        self._queued(len(request.ids))
+        return {'queued': len(request.ids)}
+
+    async def enable(self, request: TimerIds):
+        self._queue_states(request.ids, True)
+        return {'queued': len(request.ids)}
+
+    async def disable(self, request: TimerIds):
+        self._queue_states(request.ids, False)
+        return {'queued': len(request.ids)}
+
+    async def stream(self, websocket: WebSocket):
+        await websocket.accept()
+        if self._last_states is None:
+            self._last_states = self.controller.states()
+        # The baseline later deltas are taken against, so the client's view stays exact
+        await websocket.send_text(json.dumps({'full': _rows(self._last_states)}))
+        self._subscribers.add(websocket)
+        if self._stream_task is None:
+            self._stream_task = asyncio.create_task(self._broadcast())
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._subscribers.discard(websocket)
+
+    def _queue_states(self, ids, enabled):
+        for timer_id in ids:
+            # Re-inserted so the order of the last request for each id is kept
+            self._enabled.pop(timer_id, None)
+            self._enabled[timer_id] = enabled
+        self._queued(len(ids))
+
+    def _queued(self, count):
+        self.commands += count
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(self.tick)
+        # Taken before any await below, so requests arriving meanwhile start the next batch
+        self._flush_task = None
+        resets, self._resets = self._resets, set()
+        states, self._enabled = self._enabled, {}
+        self.flushes += 1
+
+        disable = [timer_id for timer_id, enabled in states.items() if not enabled]
+        enable = [timer_id for timer_id, enabled in states.items() if enabled]
+        if disable:
+            self.controller.disable(disable)
+        if enable:
+            await self.controller.enable(enable)
+        if resets:
+            self.controller.reset(list(resets))
+
+    async def _broadcast(self):
+        try:
+            while self._subscribers:
+                await asyncio.sleep(self.stream_interval)
+                states = self.controller.states()
+                last = self._last_states or {}
+                changed = [(timer_id, state) for timer_id, state in states.items() if last.get(timer_id) != state]
+                removed = [timer_id for timer_id in last if timer_id not in states]
+                self._last_states = states
+                if not changed and not removed:
+                    continue
+                message = json.dumps({'d': _rows(dict(changed)), 'r': removed})
+                for websocket in list(self._subscribers):
+                    try:
+                        await websocket.send_text(message)
+                    except Exception:
+                        self._subscribers.discard(websocket)
+        finally:
+            self._stream_task = None
+            self._last_states = None
+
+
+def _rows(states):
+    return [[timer_id, remaining, int(triggered)] for timer_id, (remaining, triggered) in states.items()]
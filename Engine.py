@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from AsyncTimerManager import AsyncTimerManager
+from AudioEngine import audio_engine
+from InputHub import InputHub, string_to_key
+from Notifier import notifier
+from Profiler import profiler
+from StatusBoard import StatusBoard
+from Timer import Timer, resource_path
+from TimerManager import TimerManager
+from TimerStorage import TimerStorage
+from Trace import TraceRecorder
+
+
+def get_documents_timers_folder():
+    # Find user documents folder
+    if os.name == 'nt':
+        documents_folder = Path(os.environ['USERPROFILE']) / 'Documents'
+    else:
+        documents_folder = Path.home() / 'Documents'
+    timers_folder = documents_folder / 'timers'
+    timers_folder.mkdir(parents=True, exist_ok=True)
+    return timers_folder
+
+
+def process_usage():
+    """Return (resident set size in bytes or None, CPU seconds) for this process."""
+    cpu = time.process_time()
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss, cpu
+    except ImportError:
+        pass
+    try:
+        # Linux without psutil: second field of statm is resident pages
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'), cpu
+    except (OSError, ValueError, AttributeError):
+        return None, cpu
+
+
+class Engine:
+    """
+    Everything needed to run timers, with no UI attached.
+
+    Holds the timer manager and its scheduler thread, the shared keyboard hub, saved timer
+    storage, the status board and the notification worker. The NiceGUI front-end in
+    main.py builds on top of an Engine, and headless.py runs one on its own.
+
+    With use_asyncio the manager is an AsyncTimerManager scheduled on the event loop
+    instead of a thread, and start() must be called from that loop.
+    """
+
+    def __init__(self, timers_folder=None, use_asyncio=False):
+        self.input_hub = InputHub()
+        self.use_asyncio = use_asyncio
+        self.manager = (AsyncTimerManager if use_asyncio else TimerManager)(self.input_hub)
+        self.storage = TimerStorage(timers_folder or get_documents_timers_folder())
+        self.status_board = StatusBoard()
+        self.audio = audio_engine
+        self.notifier = notifier
+        self.profiler = profiler
+        profiler.folder = self.storage.folder / 'profiles'
+        self._thread = None
+
+    def start(self):
+        if self.use_asyncio:
+            self.manager.start()
+        elif self._thread is None:
+            self._thread = threading.Thread(target=self.manager.run, name='timer-manager', daemon=True)
+            self._thread.start()
+
+    def record_trace(self, path):
+        """Write a trace of every timer added, removed, reset and fired to path, for simulate.py."""
+        self.manager.trace = TraceRecorder.to_file(path, self.manager.clock)
+
+    def stop(self):
+        self.manager.stop()
+        self.input_hub.stop()
+        self.audio.stop()
+        self.notifier.stop()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.manager.trace is not None:
+            self.manager.trace.close()
+
+    async def wait_triggered(self, timer_id):
+        """Wait until the timer registered as timer_id is due."""
+        await self.manager.wait_triggered(timer_id)
+
+    def timer_from_config(self, data, status_sink, use_notification=False, uid=None):
+        """Build a Timer from saved timer data, as TimerCard.get_timer does for a card."""
+        return Timer(data.get("interval"), status_sink, key=string_to_key(data.get("key")),
+                     timer_name=data.get("name") or "Generic Timer",
+                     sound_path=data.get("file_path") or resource_path("retro.wav"),
+                     volume=min(data.get("volume", 1), 1), use_notification=use_notification,
+                     catch_up=data.get("catch_up", "skip"), trim_sound=data.get("trim_sound", False),
+                     uid=uid)
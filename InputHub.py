@@ -0,0 +1,165 @@
+import asyncio
+import queue
+import threading
+import time
+
+from Metrics import metrics
+
+
+class InputHub:
+    """
+    Owns the process' single keyboard listener and dispatches presses to bound timers.
+
+    Presses are queued by the listener callback and handed out by one dispatch thread,
+    so no press is lost even when several land close together. Bindings are kept in a
+    dict from key to the set of timer ids, which makes each dispatch a single lookup.
+    Keys are indexed by str(key), the same form they are saved in. The OS keyboard hook
+    is only installed while something listens: the first subscription or next_key() call
+    starts a listener, and it is stopped again once the last binding is gone and no
+    next_key() is waiting, so an idle app isn't woken by every key press. Presses made
+    while nothing is bound are not seen by anyone anyway.
+
+    on_key is called as on_key(timer_id, pressed_at), where pressed_at is the press'
+    perf_counter() time while metrics are enabled and None otherwise.
+    """
+
+    def __init__(self, on_key=None, listener_factory=None):
+        self.on_key = on_key
+        self.bindings = {}
+        self.events = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._listener = None
+        self._listener_factory = listener_factory
+        self._dispatch_thread = None
+        self._start_lock = threading.Lock()
+        # Listeners started so far, for checking the hook comes and goes with the bindings
+        self.hooks = 0
+
+    def update_hook(self):
+        """Install or remove the keyboard hook to match whether anything is listening."""
+        with self._start_lock:
+            with self._lock:
+                wanted = bool(self.bindings or self._waiters)
+            if wanted and self._listener is None:
+                self._start()
+            elif not wanted and self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    @property
+    def hooked(self):
+        return self._listener is not None
+
+    def _start(self):
+        if self._listener_factory is None:
+            # pynput loads its platform backend on import, so only import it once a listener is needed
+            from pynput.keyboard import Listener
+            self._listener_factory = Listener
+        if self._dispatch_thread is None:
+            # Blocks on the event queue, so it costs nothing while unhooked
+            self._dispatch_thread = threading.Thread(target=self._dispatch, name='key-dispatch', daemon=True)
+            self._dispatch_thread.start()
+        # pynput listeners can't be restarted, so each hook gets a new one
+        self._listener = self._listener_factory(on_press=self._on_press)
+        self._listener.daemon = True
+        self._listener.start()
+        self.hooks += 1
+
+    def stop(self):
+        with self._start_lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+            if self._dispatch_thread is not None:
+                self.events.put(None)
+                self._dispatch_thread = None
+
+    def subscribe(self, key, timer_id):
+        with self._lock:
+            self.bindings.setdefault(str(key), set()).add(timer_id)
+        self.update_hook()
+
+    def unsubscribe(self, key, timer_id):
+        with self._lock:
+            bound = self.bindings.get(str(key))
+            if bound is None:
+                return
+            bound.discard(timer_id)
+            if bound:
+                return
+            del self.bindings[str(key)]
+        self.update_hook()
+
+    async def next_key(self):
+        """Wait for the next key press, without consuming it from bound timers."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            self._waiters.append(waiter)
+        self.update_hook()
+        try:
+            return await future
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            self.update_hook()
+
+    def _on_press(self, key):
+        # Runs on the OS hook thread, so keep it to a queue put
+        self.events.put((key, time.perf_counter() if metrics.enabled else None))
+
+    def _dispatch(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            key, pressed_at = event
+            with self._lock:
+                timer_ids = tuple(self.bindings.get(str(key), ()))
+                waiters, self._waiters = self._waiters, []
+
+            for loop, future in waiters:
+                loop.call_soon_threadsafe(_resolve, future, key)
+            if self.on_key is not None:
+                for timer_id in timer_ids:
+                    self.on_key(timer_id, pressed_at)
+
+
+def string_to_key(key_str):
+    """
+    Converts a string like 'Key.enter', 'a', or "'g'" to the appropriate Key or KeyCode.
+    Returns:
+        - Key for special keys
+        - KeyCode for regular keys
+        - None if invalid
+    """
+    # Unbound timers are saved with str(None)
+    if key_str is None or key_str == "None":
+        return None
+    from pynput.keyboard import Key, KeyCode
+
+    # Remove surrounding quotes if present
+    if (isinstance(key_str, str) and
+            ((key_str.startswith("'") and key_str.endswith("'")) or
+             (key_str.startswith('"') and key_str.endswith('"')))):
+        key_str = key_str[1:-1]
+
+    if key_str.startswith('Key.'):
+        member_name = key_str.split('.', 1)[1]
+        try:
+            return getattr(Key, member_name)
+        except AttributeError:
+            return None  # Invalid key string
+    elif len(key_str) == 1:
+        # Match pynput's KeyCode(char=...)
+        return KeyCode(char=key_str)
+    else:
+        return None  # Unrecognized
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
@@ -0,0 +1,162 @@
+import math
+import threading
+
+# Each power of two is split into this many linear buckets, so a recorded value is off by
+# at most 1/SUB_BUCKETS (about 6%) of itself, as in an HdrHistogram
+SUB_BUCKETS = 16
+# Values are in seconds and bucketed from 2^MIN_EXPONENT (about 1 us) up
+MIN_EXPONENT = -20
+MAX_EXPONENT = 12
+
+
+class Histogram:
+    """Log-linear histogram of durations in seconds with a fixed relative error."""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self.counts[_bucket(value)] += 1
+
+    def percentile(self, percent):
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self):
+        """Yield (upper bound, count of values at or below it) per power of two."""
+        seen = 0
+        for exponent in range(MIN_EXPONENT, MAX_EXPONENT + 1):
+            start = (exponent - MIN_EXPONENT) * SUB_BUCKETS
+            seen += sum(self.counts[start:start + SUB_BUCKETS])
+            yield 2.0 ** (exponent + 1), seen
+
+
+def _bucket(value):
+    if value <= 0:
+        return 0
+    mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    exponent -= 1
+    if exponent < MIN_EXPONENT:
+        return 0
+    if exponent > MAX_EXPONENT:
+        return (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS - 1
+    sub_bucket = int((mantissa * 2 - 1) * SUB_BUCKETS)
+    return (exponent - MIN_EXPONENT) * SUB_BUCKETS + sub_bucket
+
+
+def _upper_bound(index):
+    exponent, sub_bucket = divmod(index, SUB_BUCKETS)
+    return 2.0 ** (exponent + MIN_EXPONENT) * (1 + (sub_bucket + 1) / SUB_BUCKETS)
+
+
+# Exported names and help text for the histograms the engine records
+DESCRIPTIONS = {
+    'trigger_lateness_seconds': "Time from a timer's due time to it actually firing",
+    'key_to_reset_seconds': "Time from a bound key press to its timer being reset",
+    'tick_seconds': "Time the scheduler spends running the timers due at one wakeup",
+    'command_wait_seconds': "Time from a change being queued to the scheduler applying it",
+}
+
+
+class Metrics:
+    """
+    Latency histograms for the engine, global and per timer.
+
+    Per-timer histograms are keyed by the timer's id and exported with its name as a
+    separate label, since names needn't be unique.
+
+    Recording is off by default. Call sites check `metrics.enabled` before taking any
+    timestamps, so when disabled the only cost is that attribute lookup.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self.per_timer = {}
+        # Timer id -> the name it was last recorded under
+        self.timer_names = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, value, timer=None, timer_name=None):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(value)
+            if timer is not None:
+                histogram = self.per_timer.get((name, timer))
+                if histogram is None:
+                    histogram = self.per_timer[(name, timer)] = Histogram()
+                histogram.record(value)
+                if timer_name is not None:
+                    self.timer_names[timer] = timer_name
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.per_timer.clear()
+            self.timer_names.clear()
+
+    def summary(self):
+        """Return {name: {count, p50, p99, max}} for the global histograms."""
+        with self._lock:
+            return {
+                name: {'count': h.count, 'p50': h.percentile(50), 'p99': h.percentile(99), 'max': h.max}
+                for name, h in self.histograms.items()
+            }
+
+    def prometheus_text(self):
+        """Global histograms as Prometheus histograms and per-timer ones as summaries."""
+        lines = []
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"timer_{name}"
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for upper_bound, seen in histogram.cumulative():
+                    lines.append(f'{metric}_bucket{{le="{upper_bound:.9g}"}} {seen}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.total:.9g}")
+                lines.append(f"{metric}_count {histogram.count}")
+
+            by_name = {}
+            for (name, timer), histogram in self.per_timer.items():
+                by_name.setdefault(name, []).append((timer, histogram))
+            for name, timers in sorted(by_name.items()):
+                metric = f"timer_{name.replace('_seconds', '')}_per_timer_seconds"
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}, per timer")
+                lines.append(f"# TYPE {metric} summary")
+                for timer, histogram in sorted(timers, key=lambda item: str(item[0])):
+                    labels = f'timer="{_escape(str(timer))}"'
+                    if timer in self.timer_names:
+                        labels += f',name="{_escape(str(self.timer_names[timer]))}"'
+                    for quantile in (0.5, 0.9, 0.99):
+                        lines.append(f'{metric}{{{labels},quantile="{quantile}"}} '
+                                     f'{histogram.percentile(quantile * 100):.9g}')
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.total:.9g}')
+                    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared by the whole engine
+metrics = Metrics()
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+
+# A merged notification names this many timers and counts the rest
+MERGED_TITLES = 5
+
+
+class ToastBackend:
+    """Windows toasts through win10toast, imported the first time a toast is shown."""
+
+    def __init__(self):
+        self._toaster = None
+
+    def show(self, title, message, duration, icon_path=None):
+        if self._toaster is None:
+            from win10toast import ToastNotifier
+            self._toaster = ToastNotifier()
+        # Blocks for the toast's duration, which is what keeps toasts from piling up
+        self._toaster.show_toast(title, message, duration=duration, icon_path=icon_path, threaded=False)
+
+
+class PrintBackend:
+    """Prints notifications instead of showing them, for platforms without toasts."""
+
+    def show(self, title, message, duration, icon_path=None):
+        print(f"[notify] {title}: {message}", flush=True)
+
+
+class Notifier:
+    """
+    Shows notifications one at a time from a single worker thread.
+
+    notify() never blocks. Pending notifications are kept per source, in order, so a
+    source that asks again before its last one was shown is merged into it rather than
+    queued twice. A source is rate limited to one notification per min_interval seconds,
+    and once max_pending sources are waiting further ones are dropped and counted. When
+    the worker gets to the queue it shows everything pending as a single notification,
+    e.g. "3 timers due", so a burst of overdue timers produces one toast, not dozens.
+
+    The backend is any object with show(title, message, duration, icon_path); it may
+    block, and ToastBackend is used if none is given.
+    """
+
+    def __init__(self, backend=None, max_pending=32, min_interval=5.0):
+        self.backend = backend
+        self.max_pending = max_pending
+        self.min_interval = min_interval
+        self._pending = OrderedDict()
+        self._last_accepted = {}
+        self._changed = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.shown = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        with self._changed:
+            if self._thread is not None:
+                return
+            if self.backend is None:
+                self.backend = ToastBackend()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._changed:
+            self._running = False
+            self._thread = None
+            self._changed.notify()
+
+    def notify(self, title, message, duration=5, icon_path=None, source=None):
+        """Queue a notification without blocking; returns False if it was not queued."""
+        if self._thread is None:
+            self.start()
+        if source is None:
+            source = title
+        now = time.monotonic()
+        with self._changed:
+            if source in self._pending:
+                self._pending[source] = (title, message, duration, icon_path)
+                self.coalesced += 1
+                return True
+            last = self._last_accepted.get(source)
+            if last is not None and now - last < self.min_interval:
+                self.rate_limited += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending[source] = (title, message, duration, icon_path)
+            self._last_accepted[source] = now
+            self._changed.notify()
+        return True
+
+    def stats(self):
+        with self._changed:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'shown': self.shown,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while self._running and not self._pending:
+                    self._changed.wait()
+                if not self._running:
+                    return
+                batch = list(self._pending.values())
+                self._pending.clear()
+                # Sources past their rate limit needn't be remembered
+                cutoff = time.monotonic() - self.min_interval
+                self._last_accepted = {source: accepted for source, accepted in self._last_accepted.items()
+                                       if accepted > cutoff}
+            try:
+                self.backend.show(*merge(batch))
+                self.shown += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Notification failed: {e}")
+
+
+def merge(batch):
+    """Turn pending (title, message, duration, icon_path) tuples into one notification."""
+    if len(batch) == 1:
+        return batch[0]
+    titles = [title for title, _, _, _ in batch]
+    if len(titles) > MERGED_TITLES:
+        titles[MERGED_TITLES:] = [f"and {len(titles) - MERGED_TITLES} more"]
+    duration = max(duration for _, _, duration, _ in batch)
+    return f"{len(batch)} timers due", ", ".join(titles), duration, batch[0][3]
+
+
+# Shared by every timer in the process
+notifier = Notifier()
@@ -0,0 +1,165 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import wave
+from pathlib import Path
+
+from AudioEngine import get_mixer
+
+# Sounds longer than this are streamed from the file rather than decoded
+STREAM_AFTER_SECONDS = 120
+# Used to estimate an MP3's length from its size without decoding it
+ASSUMED_MP3_BYTES_PER_SECOND = 128_000 // 8
+# Ends every cache entry: a marker and the PCM length, so a truncated entry is told apart
+FOOTER = struct.Struct('<8sQ')
+FOOTER_MAGIC = b'TPPCM001'
+
+
+def default_cache_folder():
+    if os.name == 'nt':
+        base = Path(os.environ.get('LOCALAPPDATA', Path.home() / 'AppData' / 'Local'))
+    else:
+        base = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+    return base / 'TimerProgram' / 'pcm'
+
+
+def estimate_seconds(path):
+    """Length of a sound file from its header (WAV) or its size (anything else), without decoding."""
+    try:
+        with wave.open(str(path), 'rb') as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return os.path.getsize(path) / ASSUMED_MP3_BYTES_PER_SECOND
+
+
+class StreamedSound:
+    """A sound too long to decode up front; AudioEngine plays it through mixer.music."""
+
+    __slots__ = ('path', 'length')
+    streamed = True
+
+    def __init__(self, path, length):
+        self.path = path
+        self.length = length
+
+    def get_length(self):
+        return self.length
+
+
+class PcmCache:
+    """
+    Transcodes sound files once to the mixer's native PCM and keeps the result on disk.
+
+    Entries are named by a hash of the file's contents, the mixer format and the trim
+    length, so a moved or renamed copy of a file reuses the same entry and an edited file
+    gets a new one. Loading an entry memory-maps it straight into a mixer Sound, which
+    skips MP3/WAV decoding and reading the file into a Python bytes object first. Files
+    estimated to be longer than stream_after seconds are not decoded at all and come
+    back as a StreamedSound. An entry that is cut short, e.g. by a crash or a full disk,
+    fails its footer check and is transcoded again.
+    """
+
+    def __init__(self, folder=None, stream_after=STREAM_AFTER_SECONDS):
+        self.folder = Path(folder) if folder is not None else default_cache_folder()
+        self.stream_after = stream_after
+        self._lock = threading.Lock()
+        # Cache file -> Event set once the transcode under way for it has finished
+        self._loading = {}
+        # (realpath, mtime_ns, size) -> content hash, so unchanged files aren't hashed twice
+        self._hashes = {}
+        self.transcodes = 0
+        self.hits = 0
+
+    def load(self, path, trim_seconds=None):
+        """Return a mixer Sound for path (trimmed if asked) or a StreamedSound for long files."""
+        length = estimate_seconds(path)
+        if trim_seconds is None and length > self.stream_after:
+            return StreamedSound(path, length)
+        prepared = self.prepare(path, trim_seconds)
+        with open(prepared, 'rb') as f:
+            length = os.fstat(f.fileno()).st_size - FOOTER.size
+            if length <= 0:
+                return get_mixer().Sound(buffer=b'')
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mapped:
+                return get_mixer().Sound(buffer=mapped)
+
+    def prepare(self, path, trim_seconds=None):
+        """Transcode path into the cache unless it is there already; returns the cached file."""
+        mixer = get_mixer()
+        frequency, size, channels = mixer.get_init()
+        name = f"{self._content_hash(path)}-{frequency}-{size}-{channels}"
+        if trim_seconds is not None:
+            name += f"-trim{trim_seconds:g}"
+        target = self.folder / f"{name}.pcm"
+
+        while True:
+            if _complete(target):
+                with self._lock:
+                    self.hits += 1
+                return target
+            with self._lock:
+                loading = self._loading.get(target)
+                if loading is None:
+                    loading = self._loading[target] = threading.Event()
+                    break
+            # Only one transcode per entry: wait for the one under way, then look again
+            loading.wait()
+
+        # Transcoded outside the lock, so hits and other files don't queue behind a long decode
+        try:
+            if _complete(target):  # finished just before this caller took over
+                with self._lock:
+                    self.hits += 1
+                return target
+            raw = mixer.Sound(str(path)).get_raw()
+            if trim_seconds is not None:
+                frame_bytes = abs(size) // 8 * channels
+                raw = raw[:int(trim_seconds * frequency) * frame_bytes]
+            self.folder.mkdir(parents=True, exist_ok=True)
+            # Written aside, synced and renamed, so a crash never leaves a truncated entry behind
+            tmp_path = target.with_name(target.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(raw)
+                f.write(FOOTER.pack(FOOTER_MAGIC, len(raw)))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, target)
+            with self._lock:
+                self.transcodes += 1
+            return target
+        finally:
+            with self._lock:
+                del self._loading[target]
+            loading.set()
+
+    def _content_hash(self, path):
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._hashes.get(key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(block)
+            digest = self._hashes[key] = hasher.hexdigest()[:32]
+        return digest
+
+
+def _complete(target):
+    """Whether target is a whole cache entry, with a footer matching its length."""
+    try:
+        with open(target, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < FOOTER.size:
+                return False
+            f.seek(size - FOOTER.size)
+            magic, length = FOOTER.unpack(f.read(FOOTER.size))
+    except OSError:
+        return False
+    return magic == FOOTER_MAGIC and length == size - FOOTER.size
+
+
+# Shared by the sound cache and the file picker
+pcm_cache = PcmCache()
@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Frames kept per sample, counted from the outermost
+MAX_DEPTH = 64
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread for a while, on demand.
+
+    capture() blocks for the given number of seconds, reading sys._current_frames() every
+    interval, and writes the result as a collapsed-stack file (one "thread;outer;...;inner
+    count" line per distinct stack, as read by flamegraph.pl and speedscope) plus a JSON
+    summary next to it. The summary has each thread's CPU time over the capture and the
+    totals of the named spans recorded meanwhile.
+
+    Spans time hot paths such as a timer's checkAndRun; code records one only while a
+    capture is running, as with metrics:
+
+        started = time.perf_counter() if profiler.active else None
+        ...
+        if started is not None:
+            profiler.add_span('checkAndRun', started)
+
+    Nothing is sampled or recorded outside a capture, and one capture runs at a time.
+    """
+
+    def __init__(self, folder=None, interval=0.005):
+        self.folder = Path(folder) if folder is not None else Path.cwd() / 'profiles'
+        self.interval = interval
+        self.active = False
+        self._lock = threading.Lock()
+        # (span name, thread name) -> [count, total seconds, max seconds]
+        self._spans = {}
+
+    def add_span(self, name, started):
+        elapsed = time.perf_counter() - started
+        key = (name, threading.current_thread().name)
+        with self._lock:
+            stats = self._spans.get(key)
+            if stats is None:
+                self._spans[key] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+    def capture(self, seconds):
+        """Profile every other thread for seconds, write the files and return the summary."""
+        with self._lock:
+            if self.active:
+                raise RuntimeError("A profile is already being captured")
+            self.active = True
+            self._spans = {}
+        try:
+            stacks, samples, cpu, elapsed = self._sample(seconds)
+        finally:
+            self.active = False
+        with self._lock:
+            spans, self._spans = self._spans, {}
+
+        folder = Path(self.folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        with open(path, 'w', encoding='utf-8') as f:
+            for (thread_name, codes), count in stacks.most_common():
+                frames = [_label(thread_name)] + [_frame_label(code) for code in codes]
+                f.write(f"{';'.join(frames)} {count}\n")
+
+        summary = {
+            'path': str(path),
+            'seconds': round(elapsed, 3),
+            'samples': samples,
+            'threads': sorted(({'name': name, 'cpu_seconds': used,
+                                'cpu_percent': None if used is None else round(100 * used / elapsed, 2)}
+                               for name, used in cpu.items()),
+                              key=lambda thread: -(thread['cpu_seconds'] or 0)),
+            'spans': sorted(({'name': name, 'thread': thread_name, 'count': count,
+                              'total_seconds': total, 'mean_seconds': total / count, 'max_seconds': worst}
+                             for (name, thread_name), (count, total, worst) in spans.items()),
+                            key=lambda span: -span['total_seconds']),
+        }
+        with open(path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def _sample(self, seconds):
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        cpu_before = _thread_cpu_times()
+        started = time.perf_counter()
+        end = started + seconds
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None and len(codes) < MAX_DEPTH:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                stacks[names.get(ident, f"thread-{ident}"), tuple(codes)] += 1
+            samples += 1
+            now = time.perf_counter()
+            if now >= end:
+                break
+            time.sleep(min(self.interval, end - now))
+        elapsed = time.perf_counter() - started
+
+        cpu_after = _thread_cpu_times()
+        cpu = {}
+        for ident, name in ((thread.ident, thread.name) for thread in threading.enumerate()):
+            if ident == me:
+                continue
+            after = cpu_after.get(ident)
+            cpu[name] = None if after is None else round(after - cpu_before.get(ident, 0.0), 6)
+        return stacks, samples, cpu, elapsed
+
+
+def _thread_cpu_times():
+    """CPU seconds used so far by each live thread, by ident, where the platform can tell."""
+    times = {}
+    threads = threading.enumerate()
+    if hasattr(time, 'pthread_getcpuclockid'):
+        for thread in threads:
+            try:
+                times[thread.ident] = time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+            except (OSError, TypeError):
+                pass
+        return times
+    try:
+        import psutil
+    except ImportError:
+        return times
+    # Windows: psutil reports threads by their native id
+    by_native = {thread.native_id: thread.ident for thread in threads}
+    for entry in psutil.Process().threads():
+        ident = by_native.get(entry.id)
+        if ident is not None:
+            times[ident] = entry.user_time + entry.system_time
+    return times
+
+
+def _label(text):
+    # ';' separates frames; spaces are fine, since only the last one precedes the count
+    return text.replace(';', ':')
+
+
+def _frame_label(code):
+    return _label(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+
+
+# Shared by the engine's hot paths and the UI's profile button
+profiler = SamplingProfiler()
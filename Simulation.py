@@ -0,0 +1,104 @@
+from Clock import VirtualClock
+from Timer import DEFAULT_SOUND_TIME, Timer
+from TimerManager import TimerManager
+from Trace import INPUT_EVENTS, TraceRecorder
+
+# How long a timer that is still due after running waits for its next run, standing in
+# for the real scheduler's next pass; the virtual clock would otherwise never move on
+RERUN_SECONDS = 0.001
+
+
+class SimulatedTimer(Timer):
+    """A Timer without a sound or a display; its fires only show up in the trace."""
+
+    def load_sound(self, trim_seconds):
+        return None
+
+    def play_sound(self):
+        pass
+
+    def send_notification(self):
+        pass
+
+
+class Simulation:
+    """
+    Runs a timer schedule on a VirtualClock, as fast as it can be computed.
+
+    run() takes trace events (see Trace.TraceRecorder) as its script: timers are added,
+    removed, reset and keys pressed at the script's times, and in between the clock
+    jumps straight to the next deadline, so a day of thousands of timers takes seconds.
+    `events` is the resulting trace, inputs and fires alike, in the same format, so two
+    runs can be diffed line by line and a trace recorded by a real session (python
+    headless.py --record-trace) can be replayed offline.
+
+    Nothing here touches threads, sounds or the UI; the TimerManager is driven with
+    step() instead of its run loop.
+    """
+
+    def __init__(self):
+        self.clock = VirtualClock()
+        self.manager = TimerManager(clock=self.clock)
+        self.events = []
+        self.manager.trace = TraceRecorder(self.events.append, self.clock)
+        # Key as written in the trace -> ids of the timers bound to it
+        self._bound = {}
+
+    def run(self, script, until=None):
+        """Play the script's input events and run the timers until `until` seconds, by default its last event."""
+        if until is None:
+            until = max((event['t'] for event in script), default=0)
+        script = sorted((event for event in script if event['event'] in INPUT_EVENTS), key=lambda event: event['t'])
+        start = self.manager.trace.start
+        end = start + until
+        index = 0
+        due = self.manager.step()
+        while True:
+            when = start + script[index]['t'] if index < len(script) else None
+            if due is not None and (when is None or due < when):
+                when = due
+            if when is None or when > end:
+                break
+            self.clock.advance_to(when)
+            # Commands at a deadline are applied before it runs, as in the real scheduler
+            while index < len(script) and start + script[index]['t'] <= self.clock.now:
+                self._play(script[index])
+                index += 1
+            due = self.manager.step()
+            if due is not None and due <= self.clock.now:
+                due = self.clock.now + RERUN_SECONDS
+        self.clock.advance_to(end)
+        return self.events
+
+    def _play(self, event):
+        kind = event['event']
+        if kind == 'add':
+            self._add(event)
+        elif kind == 'remove':
+            for bound in self._bound.values():
+                bound.discard(event['timer'])
+            self.manager.remove_timer(event['timer'])
+        elif kind == 'reset':
+            self.manager.manual_reset(event['timer'])
+        else:  # key
+            self.manager.reset_many(self._bound.get(event['key'], ()))
+
+    def _add(self, event):
+        if 'interval' not in event:
+            return  # recorded from something other than a Timer
+        timer_id, key = event['timer'], event.get('key')
+        timer = SimulatedTimer(event['interval'], None, key=key,
+                               timer_name=event.get('name') or "Generic Timer",
+                               sound_path='simulated' if event.get('sound', True) else None,
+                               sound_time=event.get('sound_time', DEFAULT_SOUND_TIME),
+                               catch_up=event.get('catch_up', 'skip'), clock=self.clock)
+        start = self.manager.trace.start
+        if event.get('started') is not None:
+            timer.reset(start + event['started'])
+        if event.get('sounded') is not None:
+            timer.last_sound = start + event['sounded']
+        for bound in self._bound.values():
+            bound.discard(timer_id)
+        if key is not None:
+            self._bound.setdefault(key, set()).add(timer_id)
+        self.manager.add_timer(timer, timer_id, event.get('group'))
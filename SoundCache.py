@@ -0,0 +1,127 @@
+import os
+import threading
+from collections import OrderedDict
+
+from AudioEngine import get_mixer
+from PcmCache import pcm_cache
+
+
+def load_sound(path, trim_seconds=None):
+    # Goes through the on-disk PCM cache, so each file is only ever decoded once
+    return pcm_cache.load(path, trim_seconds)
+
+
+def sound_bytes(sound) -> int:
+    """Approximate decoded size of a pygame Sound from its length and the mixer format."""
+    if getattr(sound, 'streamed', False):
+        return 0
+    mixer_format = get_mixer().get_init()
+    if mixer_format is None:
+        return 0
+    frequency, size, channels = mixer_format
+    return int(sound.get_length() * frequency) * (abs(size) // 8) * channels
+
+
+class SoundCache:
+    """
+    Shares decoded sounds between timers that use the same file.
+
+    Entries are keyed by resolved path, modification time and trim length, so editing a
+    file on disk gives a fresh decode. Least recently used entries are evicted once the decoded bytes
+    exceed the budget; a timer still holding an evicted sound keeps it alive until it is
+    disabled. Volume is not stored on the shared sound - timers apply it per play.
+    """
+
+    def __init__(self, budget_bytes=64 * 1024 * 1024, loader=load_sound, sizer=sound_bytes):
+        self.budget_bytes = budget_bytes
+        self._loader = loader
+        self._sizer = sizer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Cache key -> Event set once the decode under way for it has finished
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+
+    def get(self, path, trim_seconds=None):
+        resolved = os.path.realpath(path)
+        cache_key = (resolved, os.stat(resolved).st_mtime_ns, trim_seconds)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return entry[0]
+                loading = self._loading.get(cache_key)
+                if loading is None:
+                    loading = self._loading[cache_key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Concurrent enables of one file decode it once: wait for that decode, then look again
+            loading.wait()
+
+        # Decoded outside the lock, so other files stay available meanwhile
+        try:
+            sound = self._loader(resolved, trim_seconds)
+            size = self._sizer(sound)
+            with self._lock:
+                self._discard_stale(resolved, trim_seconds)
+                self._entries[cache_key] = (sound, size)
+                self.resident_bytes += size
+                self._evict()
+            return sound
+        finally:
+            with self._lock:
+                del self._loading[cache_key]
+            loading.set()
+
+    def prewarm(self, sounds):
+        """
+        Decode every (path, trim_seconds) in sounds ahead of use.
+
+        Returns (path, error) for those that failed.
+        """
+        failed = []
+        for path, trim_seconds in dict.fromkeys(sounds):
+            try:
+                self.get(path, trim_seconds)
+            except Exception as e:
+                failed.append((path, e))
+        return failed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'resident_bytes': self.resident_bytes,
+                'budget_bytes': self.budget_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def _discard_stale(self, resolved, trim_seconds):
+        # Older decodes of a file that has since changed on disk
+        for cache_key in [k for k in self._entries if k[0] == resolved and k[2] == trim_seconds]:
+            _, size = self._entries.pop(cache_key)
+            self.resident_bytes -= size
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while self.resident_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.resident_bytes -= size
+            self.evictions += 1
+
+
+# Shared by every timer in the process
+sound_cache = SoundCache()
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+
+from Profiler import profiler
+
+
+class StatusSink:
+    """Stands in for a TimerCard as a Timer's display, writing to a StatusBoard instead."""
+
+    __slots__ = ('board', 'card_id')
+
+    def __init__(self, board, card_id):
+        self.board = board
+        self.card_id = card_id
+
+    def update_status(self, value):
+        self.board.publish(self.card_id, value)
+
+
+class NullStatus:
+    """Status sink that discards everything, for running without any display."""
+
+    __slots__ = ()
+
+    def update_status(self, value):
+        pass
+
+
+class PrintStatus:
+    """Status sink that prints a timer's status to stdout whenever it changes."""
+
+    __slots__ = ('name', 'last')
+
+    def __init__(self, name):
+        self.name = name
+        self.last = None
+
+    def update_status(self, value):
+        if value != self.last:
+            self.last = value
+            print(f"{self.name}: {value}", flush=True)
+
+
+class Countdown:
+    """
+    Status of a running timer, published once per period instead of once a second.
+
+    It renders as the seconds left at the moment it is shown, so whoever displays it
+    does the counting down.
+    """
+
+    __slots__ = ('deadline', 'clock')
+
+    def __init__(self, deadline, clock):
+        self.deadline = deadline
+        self.clock = clock
+
+    def __eq__(self, other):
+        return isinstance(other, Countdown) and other.deadline == self.deadline
+
+    def __hash__(self):
+        return hash(self.deadline)
+
+    def __str__(self):
+        return str(abs(round(self.deadline - self.clock.monotonic()))) + " seconds left"
+
+
+class StatusBoard:
+    """
+    Shared table of status per card, written by the engine and drained by the UI.
+
+    The engine thread only records statuses that differ from what it last published, which
+    for a running timer is one Countdown per period. A single task on the UI's event loop
+    then applies everything that changed since the previous frame in one pass, so all
+    label updates go out to the browser together, and re-renders the countdowns of the
+    cards on screen. When nothing changed and no card on screen is counting down, the
+    task parks until the next publish or refresh() wakes it, so an idle UI isn't woken
+    fps times a second.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._published = {}
+        self._pending = {}
+        # Card id -> Countdown, for the cards whose latest status is one
+        self._countdowns = {}
+        self._loop = None
+        self._ready = None
+        self._awake = False
+        self._counting = False
+        self._task = None
+        # Frames drained, for measuring idle behaviour
+        self.flushes = 0
+
+    def sink(self, card_id):
+        return StatusSink(self, card_id)
+
+    def publish(self, card_id, value):
+        with self._lock:
+            if self._published.get(card_id) == value:
+                return
+            self._published[card_id] = value
+            self._pending[card_id] = value
+            self._wake()
+
+    def clear(self, card_id):
+        with self._lock:
+            self._published.pop(card_id, None)
+            self._pending[card_id] = ""
+            self._wake()
+
+    def attach(self, get_card, fps=4):
+        """Drain the board into cards found by get_card(card_id), up to fps times a second, once the app starts."""
+        from nicegui import app
+
+        app.on_startup(lambda: self.start(get_card, fps))
+
+    def start(self, get_card, fps=4):
+        """Start draining on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        with self._lock:
+            self._awake = False
+            self._wake()
+        self._task = self._loop.create_task(self._drain(get_card, 1 / fps))
+
+    def stop(self):
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._task = None
+
+    def refresh(self):
+        """Wake the drain, e.g. once other cards are on screen and their countdowns need rendering."""
+        with self._lock:
+            self._wake()
+
+    def _wake(self):
+        # Called with the lock held, from any thread
+        if self._loop is not None and not self._awake:
+            self._awake = True
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def _drain(self, get_card, interval):
+        while True:
+            await self._ready.wait()
+            try:
+                self.flush(get_card)
+            except Exception as e:
+                print(f"Status update failed: {e}")
+            with self._lock:
+                if not self._pending and not self._counting:
+                    self._awake = False
+                    self._ready.clear()
+            await asyncio.sleep(interval)
+
+    def flush(self, get_card):
+        started = time.perf_counter() if profiler.active else None
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self.flushes += 1
+
+        for card_id, value in pending.items():
+            if isinstance(value, Countdown):
+                self._countdowns[card_id] = value
+            else:
+                self._countdowns.pop(card_id, None)
+            card = get_card(card_id)
+            if card is not None:
+                # Cheap for cards off the page, which only keep the text for when they're built
+                card.update_status(str(value))
+
+        counting = False
+        for card_id, countdown in list(self._countdowns.items()):
+            card = get_card(card_id)
+            if card is None:
+                del self._countdowns[card_id]  # the card was removed
+            elif card.is_visible():
+                card.update_status(str(countdown))
+                counting = True
+        self._counting = counting
+        if started is not None:
+            profiler.add_span('status_flush', started)
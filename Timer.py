@@ -1,10 +1,15 @@
+import math
 import os
 import sys
 import time
-import pygame
-from pynput.keyboard import Key, Listener
-import time
-import threading
+
+from AudioEngine import audio_engine
+from Clock import system_clock
+from Metrics import metrics
+from Notifier import notifier
+from Profiler import profiler
+from SoundCache import sound_cache
+from StatusBoard import Countdown
 
 def resource_path(relative_path: str) -> str:
     """
@@ -26,87 +31,150 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+# Seconds between repeats of a triggered timer's sound
+DEFAULT_SOUND_TIME = 5
+
+# What a key-less timer does about periods that passed entirely while it was late
+CATCH_UP_POLICIES = ('skip', 'burst', 'coalesce')
+
+
+def advance_deadline(deadline, interval, now, policy='skip'):
+    """
+    Return the deadline that follows `deadline` once it has fired at time `now`.
+
+    Deadlines stay on the grid deadline + k * interval, so lateness in noticing one
+    doesn't push back the next. When whole periods were missed:
+        skip     - drop them and wait for the next deadline on the grid
+        burst    - owe every one of them; the returned deadline may already be past
+        coalesce - count them all as this fire and start a fresh period from now
+    """
+    if now < deadline + interval:
+        return deadline + interval
+    if policy == 'burst':
+        return deadline + interval
+    if policy == 'coalesce':
+        return now + interval
+    missed = math.floor((now - deadline) / interval)
+    return deadline + (missed + 1) * interval
+
+
 class Timer:
     def __init__(self, interval, timer_display, key=None, timer_name="Generic Timer",
-                 sound_path=None, sound_time=5, volume=1, use_notification=False, toaster=None):
+                 sound_path=None, sound_time=DEFAULT_SOUND_TIME, volume=1, use_notification=False, catch_up='skip',
+                 trim_sound=False, clock=None, uid=None):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}, not {catch_up!r}")
         self.interval = interval
+        self.catch_up = catch_up
         self.key = key
         self.timer_name = timer_name
+        # Stable id, such as the card's saved uid, that per-timer metrics are kept under;
+        # names aren't unique, so without one only the global histograms are recorded
+        self.uid = uid
         self.sound_path = sound_path
-        self.last_trigger = time.time()
+        # All timestamps are on a monotonic clock so wall-clock steps can't misfire timers;
+        # a VirtualClock can stand in for the system one to simulate schedules
+        self.clock = clock or system_clock
+        self.last_trigger = self.clock.monotonic()
         self.sound_time = sound_time
         self.use_notification = use_notification
-        self.last_sound = time.time()
-        self.sound = pygame.mixer.Sound(self.sound_path)
-        self.sound.set_volume(volume)
-        self.last_status_update = time.time()
-        self.sound.set_volume(volume)
-        self.last_key = None
+        self.last_sound = self.clock.monotonic()
+        # Sounds or notifications so far, which is how a trace tells that the timer fired
+        self.fires = 0
+        # Decoded sounds are shared between timers, so volume is applied per play. Trimming
+        # to sound_time stops a long sound overlapping its own repeats.
+        self.sound = self.load_sound(sound_time if trim_sound else None)
+        self.volume = volume
+        # Key-bound timers wait for the player, so they win a busy channel over periodic ones
+        self.priority = 1 if key is not None else 0
+        # Deadline or "TRIGGERED", whichever the display was last given
+        self.shown_status = None
         self.running = True
         self.timer_display = timer_display
-        self.toaster = toaster
-
-        def on_press(keypress):
-            try:
-                self.last_key = keypress
-            except AttributeError:
-                time.sleep(.05)
-
-        def start_listener():
-            # Set up the listener
-            with Listener(on_press=on_press) as listener:
-                listener.join()
 
-        self.listener_thread = threading.Thread(target=start_listener, daemon=True)
-        self.listener_thread.start()
+    def load_sound(self, trim_seconds):
+        return sound_cache.get(self.sound_path, trim_seconds)
 
     def checkAndRun(self):
         if not self.running:
             return
 
-        if self.key is not None and self.last_key is not None:
-            if self.last_key == self.key:
-                self.reset()
-                self.last_key = None
-
-        if time.time() - self.last_status_update > 1:
-            if not self.isTriggered():
-                self.timer_display.update_status(
-                    str(abs(round(self.interval + (self.last_trigger - time.time())))) + " seconds left")
-            else:
-                self.timer_display.update_status("TRIGGERED")
-
-            self.last_status_update = time.time()
-
         if self.isTriggered():
             if self.sound_path is not None:
-                if time.time() - self.last_sound > self.sound_time:
-                    self.last_sound = time.time()
+                if self.clock.monotonic() >= self.last_sound + self.sound_time:
+                    if metrics.enabled:
+                        due = self.last_trigger + self.interval
+                        if self.last_sound < due:
+                            # First fire since the deadline; repeats until a reset are on purpose
+                            metrics.record('trigger_lateness_seconds', self.clock.monotonic() - due,
+                                           timer=self.uid, timer_name=self.timer_name)
+                    self.last_sound = self.clock.monotonic()
+                    self.fires += 1
                     if self.use_notification:
                         self.send_notification()
                     else:
-                        self.sound.play()
+                        self.play_sound()
                     if self.key is None:
-                        self.reset()
+                        # Phase-locked: the next period runs from this deadline, not from now
+                        deadline = self.last_trigger + self.interval
+                        self.last_trigger = advance_deadline(deadline, self.interval, self.last_sound,
+                                                             self.catch_up) - self.interval
+
+        # A timer without a display, as in simulations, has no status to publish
+        if self.timer_display is not None and self.shown_status != self.current_status():
+            self.publish_status()
+
+    def current_status(self):
+        return "TRIGGERED" if self.isTriggered() else self.last_trigger + self.interval
+
+    def publish_status(self):
+        # Only changes go out: a countdown is one update per period, rendered by the display
+        started = time.perf_counter() if profiler.active else None
+        status = self.shown_status = self.current_status()
+        self.timer_display.update_status(status if status == "TRIGGERED" else Countdown(status, self.clock))
+        if started is not None:
+            profiler.add_span('update_status', started)
 
     def isTriggered(self):
         if not self.running:
             return False
-        return time.time() - self.last_trigger > self.interval
+        # Compared the way next_due() adds up deadlines, so a clock read of exactly the
+        # deadline (as on a VirtualClock) counts as due despite float rounding
+        return self.clock.monotonic() >= self.last_trigger + self.interval
+
+    def next_due(self):
+        """
+        Monotonic time at which checkAndRun next has something to do, or None if never.
 
-    def reset(self):
-        self.last_trigger = time.time()
+        This is the trigger deadline or, once triggered, the next time the sound may
+        repeat. A status the display hasn't been given yet, as after a reset, is due at once.
+        """
+        if not self.running:
+            return None
+        if self.timer_display is not None and self.shown_status != self.current_status():
+            return self.last_trigger
+        if not self.isTriggered():
+            return self.last_trigger + self.interval
+        if self.sound_path is not None:
+            return self.last_sound + self.sound_time
+        return None
+
+    def reset(self, now=None):
+        self.last_trigger = self.clock.monotonic() if now is None else now
+
+    def play_sound(self):
+        # Only queues the sound; the audio engine thread does the actual playback
+        audio_engine.play(self.sound, self.volume, self.priority)
 
     def stop(self):
         self.running = False
 
     def send_notification(self):
-
-        # Send a notification
-        self.toaster.show_toast(
+        # Queued on the shared notifier, which shows one toast at a time and merges overdue timers
+        notifier.notify(
             self.timer_name,  # Title of the notification
             "Key: " + str(self.key),  # Message of the notification
             duration=self.sound_time,  # How long the notification should remain (seconds)
             icon_path=resource_path("clock.ico"),  # Optional: Path to a custom icon
-            threaded=True  # Run in a separate thread (won't block your program)
+            source=id(self)
         )
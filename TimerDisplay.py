@@ -1,12 +1,11 @@
-import asyncio
 import os
 import sys
-from typing import Optional, Callable
 
-from docutils.nodes import status
-from nicegui import ui
+from nicegui import run, ui
 from pathlib import Path
-from Timer import Timer
+from SoundCache import sound_cache
+from Timer import CATCH_UP_POLICIES, DEFAULT_SOUND_TIME, Timer
+from TimerStorage import new_timer_id
 from local_file_picker import local_file_picker  # adjust import as needed
 
 
@@ -36,51 +35,71 @@ def resource_path(relative_path: str) -> str:
 
 
 class TimerCard:
-    def __init__(self, card_id: int, parent_grid, get_last_keypress,
-                 set_last_keypress, on_remove=None, on_enable=None, on_disable=None,
-                 manual_reset=None, number = 0, volume=100, key=None, file_path=None, name="Generic"):
+    """
+    A timer's settings plus, while it is on screen, the card elements that edit them.
+
+    The card's state lives on this object, so its elements can be built and torn down as
+    it scrolls in and out of view (see TimerList) without affecting the running timer.
+    """
+
+    def __init__(self, card_id: int, parent_grid, input_hub, on_remove=None, on_enable=None, on_disable=None,
+                 manual_reset=None, number = 0, volume=100, key=None, file_path=None, name="Generic",
+                 uid=None, on_update=None, group="", trim_sound=False, catch_up="skip"):
         self.card_id = card_id
-        self.name_input = None
-        self.file_label = None
+        # Stable id the card is saved under, unlike card_id which is per session
+        self.uid = uid or new_timer_id()
+        self.card = None
         self.file_path = file_path
-        self.slider = None
-        self.volume_label = None
         self.enabled = False
         self.key = key
-        self.number_input = None
         self.number = number
-        self.volume = volume
+        self.volume = min(volume / 100, 1)
         self.on_remove = on_remove
         self.on_enable = on_enable
         self.on_disable = on_disable
-        self.get_last_keypress = get_last_keypress
-        self.set_last_keypress = set_last_keypress
+        self.on_update = on_update
+        self.input_hub = input_hub
         self.manual_reset = manual_reset
         self.name = name
+        # Cards sharing a group name can be started and stopped together
+        self.group = group or ""
+        # Cut the sound at the repeat interval so long sounds don't overlap themselves
+        self.trim_sound = trim_sound
+        # What a key-less timer does about periods it missed; only set in timers.json for now
+        self.catch_up = catch_up
+        self.status = ""
+
+        if parent_grid is not None:
+            self.build(parent_grid)
 
+    def build(self, parent_grid):
+        """Create the card's elements inside parent_grid."""
         with parent_grid:
             self.card = ui.card()
             with self.card:
                 with ui.row().classes("w-full justify-between items-center"):
-                    self.status_label = ui.label("Status: ")
+                    self.status_label = ui.label("Status: " + self.status)
                     self.switch = ui.switch("Turn On",
                                             on_change=lambda e: self.toggle(e.value),
                                             value=self.enabled)
                 with ui.row().classes("w-full"):
-                    self.name_input = ui.input(label="Name", value=self.name)
+                    self.name_input = ui.input(label="Name", value=self.name,
+                                               on_change=lambda e: self.set_name(e.value))
+                    self.group_input = ui.input(label="Group", value=self.group,
+                                                on_change=lambda e: self.set_group(e.value))
                     self.number_input = ui.number(label="Seconds", min=0, step=1, format='%.0f',
                                                   value=self.number,on_change=lambda e: self.setValue(e.value))
                 with ui.row().classes(""):
                     self.sound_label = ui.label('Sound: ')
                     self.file_label = ui.label('Default Sound')
                 with ui.row().classes("w-full justify-between items-center"):
-                    self.volume_label = ui.label('100%')
-                    self.slider = ui.slider(min=0, max=100, step=1, value=self.volume,
+                    self.volume_label = ui.label(f' {round(self.volume * 100)}%')
+                    self.slider = ui.slider(min=0, max=100, step=1, value=round(self.volume * 100),
                                             on_change=lambda e: self.update_volume(e.value))
-                    if self.volume != 100:
-                        self.update_volume(self.volume)
                 with ui.row().classes("w-full"):
                     self.pick_file_button = ui.button('Pick Sound', on_click=self.pick_file)
+                    self.trim_checkbox = ui.checkbox(f"Trim to {DEFAULT_SOUND_TIME} s", value=self.trim_sound,
+                                                     on_change=lambda e: self.set_trim_sound(e.value))
                     if self.file_path is not None:
                         file_name = Path(self.file_path).name
                         self.file_label.text = file_name
@@ -89,28 +108,50 @@ class TimerCard:
                         self.bind_button.set_text("Bound: " + str(self.key))
                     self.manual_reset_button = ui.button("Reset", on_click=self.reset)
                 self.remove_button = ui.button(on_click=self.remove, icon="clear")
+        self._sync_controls()
+
+    def unbuild(self):
+        """Delete the card's elements, keeping its settings and its running timer."""
+        if self.card is not None:
+            self.card.delete()
+            self.card = None
+
+    def is_built(self):
+        return self.card is not None
 
     async def pick_file(self):
-        result = await local_file_picker('~', multiple=False)
+        result = await local_file_picker('~', multiple=False, audio_only=True)
         if not result or not is_wav_or_mpe_quick(result[0]):
             ui.notify('Not a .wav or .mp3')
             return
 
         self.file_path = result[0]
-        file_name = Path(self.file_path).name
-        self.file_label.text = file_name
+        await self.prepare_sound()
 
-    async def wait_for_key(self):
-        self.set_last_keypress(None)
+    async def prepare_sound(self):
+        # Transcoded and decoded off the event loop now, so enabling the timer doesn't wait on it
+        file_name = Path(self.file_path).name
+        if self.card is not None:
+            self.file_label.text = file_name + " (preparing...)"
+        try:
+            await run.io_bound(sound_cache.get, self.file_path, self.trim_seconds())
+        except Exception as e:
+            ui.notify(f"Could not load {file_name}: {e}", type='warning')
+        if self.card is not None:
+            self.file_label.text = file_name
 
-        while self.get_last_keypress() is None:
-            await asyncio.sleep(0.05)  # non-blocking wait
+    def trim_seconds(self):
+        return DEFAULT_SOUND_TIME if self.trim_sound else None
 
-        self.key = self.get_last_keypress()
-        self.bind_button.set_text("Bound: " + str(self.key))
+    async def wait_for_key(self):
+        self.bind_button.set_text("Press a key...")
+        self.key = await self.input_hub.next_key()
+        if self.card is not None:
+            self.bind_button.set_text("Bound: " + str(self.key))
+        self._updated()
 
     def remove(self):
-        self.card.delete()
+        self.unbuild()
         if self.on_remove:
             self.on_remove(self)
 
@@ -118,65 +159,112 @@ class TimerCard:
         if self.manual_reset is not None and self.enabled:
             self.manual_reset(self.card_id)
 
-    def toggle(self, value):
+    async def toggle(self, value):
+        # Setting the switch below fires its on_change again, which lands here as a no-op
+        if value == self.enabled:
+            return
         if value is True:
-            self.name_input.disable()
-            self.pick_file_button.disable()
-            self.remove_button.disable()
-            self.slider.disable()
-            self.number_input.disable()
-            self.bind_button.disable()
-            self.switch.set_value(True)
-            self.manual_reset_button.enable()
             self.enabled = True
+            self._sync_controls()
             if self.on_enable is not None:
-                if not self.on_enable(self, self.card_id):
-                    self.toggle(False)
+                if not await self.on_enable(self, self.card_id):
+                    await self.toggle(False)
+                    return
         else:
-            self.name_input.enable()
-            self.number_input.enable()
-            self.bind_button.enable()
-            self.pick_file_button.enable()
-            self.remove_button.enable()
             self.enabled = False
-            self.slider.enable()
-            self.manual_reset_button.disable()
-            self.switch.set_value(False)
+            self._sync_controls()
             if self.on_disable is not None:
                 self.on_disable(self, self.card_id)
+        self._updated()
+
+    def mark_enabled(self, value):
+        """Show the card as on or off for a timer started or stopped elsewhere, e.g. in a batch."""
+        self.enabled = value
+        self._sync_controls()
+        self._updated()
+
+    def _sync_controls(self):
+        # Settings are locked while the timer runs; only Reset is usable
+        if self.card is None:
+            return
+        for element in (self.name_input, self.group_input, self.number_input, self.bind_button,
+                        self.pick_file_button, self.trim_checkbox, self.remove_button, self.slider):
+            element.set_enabled(not self.enabled)
+        self.manual_reset_button.set_enabled(self.enabled)
+        self.switch.set_value(self.enabled)
+
+    def _updated(self):
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def set_name(self, value):
+        self.name = value
+        self._updated()
+
+    async def set_trim_sound(self, value):
+        self.trim_sound = value
+        self._updated()
+        if self.file_path is not None:
+            await self.prepare_sound()
+
+    def set_group(self, value):
+        self.group = (value or "").strip()
+        self._updated()
 
     def update_volume(self, value):
         self.volume = value / 100
-        self.volume_label.text = f' {value}%'
+        if self.card is not None:
+            self.volume_label.text = f' {value}%'
 
     def update_status(self, value):
-        self.status_label.text = "Status: " + value
+        self.status = str(value)
+        if self.card is not None:
+            text = "Status: " + self.status
+            if self.status_label.text != text:
+                self.status_label.text = text
+
+    def is_visible(self):
+        return self.card is not None and self.card.visible
 
     def setValue(self, value):
         self.number = value
+        self._updated()
+
+    def problem(self):
+        """Why the card's timer can't be started, or None if it can."""
+        if self.number is None or self.number <= 0:
+            return "Number must be above 0."
+        if self.catch_up not in CATCH_UP_POLICIES:
+            return f"catch_up must be one of {', '.join(CATCH_UP_POLICIES)}."
+        return None
 
     def validate(self):
-        if self.number == 0:
-            ui.notify("Number cannot be 0.")
+        problem = self.problem()
+        if problem is not None:
+            ui.notify(problem)
             return False
         return True
 
-    def get_timer(self, toaster, useWindows):
+    def get_timer(self, useWindows, status_sink=None):
         if not self.validate():
             return None
         if self.file_path is None:
             self.file_path = resource_path("retro.wav")
 
-        return Timer(self.number, self, key=self.key, sound_path=self.file_path,
-                     volume=self.volume, use_notification=useWindows, toaster=toaster)
+        return Timer(self.number, status_sink or self, key=self.key, timer_name=self.name,
+                     sound_path=self.file_path, volume=self.volume, use_notification=useWindows,
+                     catch_up=self.catch_up, trim_sound=self.trim_sound, uid=self.uid)
 
     def to_dict(self):
         return {
-            'name': self.name_input.value,
+            'name': self.name,
             'interval': self.number,
             'volume': self.volume,
             'file_path': self.file_path,
             'key': str(self.key),
+            'group': self.group,
+            'trim_sound': self.trim_sound,
+            'catch_up': self.catch_up,
         }
 
 
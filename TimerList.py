@@ -0,0 +1,191 @@
+import asyncio
+
+from nicegui import ui
+
+
+# Seconds summary edits for cards off the page are held back, to batch them
+SUMMARY_DELAY = 0.5
+
+
+class TimerIndex:
+    """
+    Lookup of cards by name word, bound key and state, for the timer list's search box.
+
+    A query is a list of space separated terms. "key:<key>" and "state:on" / "state:off"
+    match exactly, anything else matches the start of a word in the timer's name.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.keys = {}
+        self.states = {"on": set(), "off": set()}
+        self._indexed = {}
+
+    def update(self, card):
+        self.remove(card)
+        words = tuple(set((card.name or "").lower().split()))
+        key = _key_text(card.key)
+        state = "on" if card.enabled else "off"
+        for word in words:
+            self.names.setdefault(word, set()).add(card.card_id)
+        if key is not None:
+            self.keys.setdefault(key, set()).add(card.card_id)
+        self.states[state].add(card.card_id)
+        self._indexed[card.card_id] = (words, key, state)
+
+    def remove(self, card):
+        indexed = self._indexed.pop(card.card_id, None)
+        if indexed is None:
+            return
+        words, key, state = indexed
+        for word in words:
+            _discard(self.names, word, card.card_id)
+        if key is not None:
+            _discard(self.keys, key, card.card_id)
+        self.states[state].discard(card.card_id)
+
+    def search(self, query):
+        """Return the ids of cards matching every term, or None if the query is empty."""
+        matches = None
+        for term in query.lower().split():
+            if term.startswith("key:"):
+                found = self.keys.get(term[4:].strip("'\""), set())
+            elif term.startswith("state:"):
+                found = self.states.get(term[6:], set())
+            else:
+                found = set()
+                for word, card_ids in self.names.items():
+                    if word.startswith(term):
+                        found |= card_ids
+            matches = found if matches is None else matches & found
+        return matches
+
+
+class TimerList:
+    """
+    Paged view of the timer cards.
+
+    Only the cards on the current page are built as full TimerCards; every other match of
+    the current search is listed as a one-line summary row in a single table, and clicking
+    a row jumps to its page. Cards that are not built keep their settings and their timers
+    keep running in the engine. on_page() is called whenever other cards are built.
+    """
+
+    def __init__(self, cards, page_size=20, on_page=None):
+        self.cards = cards
+        self.page_size = page_size
+        self.on_page = on_page
+        self.index = TimerIndex()
+        self.filtered = []
+        self._shown = []
+        self._summary_dirty = False
+        for card in cards:
+            self.index.update(card)
+
+        with ui.row().classes('w-full items-center px-4'):
+            self.search_input = ui.input(placeholder='Search: name, key:a, state:on',
+                                         on_change=lambda e: self.refresh(page=1)).classes('w-96')
+            self.pagination = ui.pagination(1, 1, direction_links=True,
+                                            on_change=lambda e: self.show_page(e.value))
+        self.grid = ui.grid(columns=2).classes('w-full gap-4 p-4')
+        self.summary = ui.table(rows=[], row_key='id', columns=[
+            {'name': 'name', 'label': 'Name', 'field': 'name', 'align': 'left'},
+            {'name': 'seconds', 'label': 'Seconds', 'field': 'seconds'},
+            {'name': 'key', 'label': 'Key', 'field': 'key'},
+            {'name': 'state', 'label': 'State', 'field': 'state'},
+        ]).classes('w-full px-4').props('dense flat')
+        self.summary.on('rowClick', lambda e: self.show_card(e.args[1]['id']))
+        self.refresh()
+
+    def add(self, card, refresh=True):
+        self.cards.append(card)
+        self.index.update(card)
+        if refresh:
+            self.refresh(page=-1)
+
+    def remove(self, card):
+        self.index.remove(card)
+        if card in self.cards:
+            self.cards.remove(card)
+        self._shown = [card_id for card_id in self._shown if card_id != card.card_id]
+        self.refresh()
+
+    def card_updated(self, card):
+        self.index.update(card)
+        if not card.is_built() and not self._summary_dirty:
+            self._summary_dirty = True
+            # Summary edits from bulk changes like Toggle All are sent at most twice a
+            # second, by a one-off callback rather than a timer that would wake when idle
+            try:
+                asyncio.get_running_loop().call_later(SUMMARY_DELAY, self._flush_summary)
+            except RuntimeError:  # no event loop yet, while saved timers load
+                self._update_summary()
+
+    def refresh(self, page=None):
+        matches = self.index.search(self.search_input.value or "")
+        self.filtered = [card for card in self.cards if matches is None or card.card_id in matches]
+        pages = max(1, -(-len(self.filtered) // self.page_size))
+        if page is None:
+            page = self.pagination.value
+        elif page == -1:
+            page = pages
+        self.pagination.max = pages
+        self.pagination.update()
+        page = min(max(page, 1), pages)
+        if self.pagination.value != page:
+            self.pagination.value = page  # show_page runs from the change event
+        else:
+            self.show_page(page)
+
+    def show_page(self, page):
+        start = (page - 1) * self.page_size
+        visible = self.filtered[start:start + self.page_size]
+        visible_ids = [card.card_id for card in visible]
+        if visible_ids != self._shown:
+            for card in self.cards:
+                card.unbuild()
+            # Built in list order so the page always matches the summary order
+            for card in visible:
+                card.build(self.grid)
+            self._shown = visible_ids
+            if self.on_page is not None:
+                self.on_page()
+        self._update_summary()
+
+    def show_card(self, card_id):
+        for position, card in enumerate(self.filtered):
+            if card.card_id == card_id:
+                self.pagination.value = position // self.page_size + 1
+                return
+
+    def _flush_summary(self):
+        if self._summary_dirty:
+            self._update_summary()
+
+    def _update_summary(self):
+        self._summary_dirty = False
+        self.summary.rows = [
+            {
+                'id': card.card_id,
+                'name': card.name,
+                'seconds': card.number,
+                'key': _key_text(card.key) or '',
+                'state': 'On' if card.enabled else 'Off',
+            }
+            for card in self.filtered if not card.is_built()
+        ]
+        self.summary.update()
+
+
+def _key_text(key):
+    if key is None:
+        return None
+    return str(key).strip("'").lower()
+
+
+def _discard(index, value, card_id):
+    card_ids = index.get(value)
+    if card_ids is not None:
+        card_ids.discard(card_id)
+        if not card_ids:
+            del index[value]
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+
+class StartupReport:
+    """Collects how long each startup stage took, measured from when the report was created."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def mark(self, stage):
+        """Record the time from startup until now, the first time stage is marked."""
+        self.stages.setdefault(stage, time.perf_counter() - self.started)
+
+    def summary(self):
+        return "Startup: " + ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in self.stages.items())
+
+
+class TimerLoader:
+    """
+    Loads saved timers off the event loop and builds their cards a batch at a time.
+
+    The page renders straight away with no cards; run() then reads and parses the saved
+    timers on a worker thread and calls build_card(uid, data) for each one, then on_batch()
+    after every batch_size of them, yielding to the event loop in between so the cards
+    hydrate progressively. A timer that fails to
+    build is skipped and reported rather than stopping the rest.
+    """
+
+    def __init__(self, storage, build_card, report=None, batch_size=25, on_batch=None):
+        self.storage = storage
+        self.build_card = build_card
+        self.on_batch = on_batch
+        self.report = report if report is not None else StartupReport()
+        self.batch_size = batch_size
+        self.errors = []
+        self.done = False
+
+    async def run(self):
+        self.errors = []
+        try:
+            records = await asyncio.get_running_loop().run_in_executor(None, self.storage.load)
+        except Exception as e:
+            # Still finish the load, so the timers made this session can be saved
+            self.errors.append(f"Failed to load saved timers: {e}")
+            records = {}
+        self.errors.extend(self.storage.errors)
+        self.report.add("read", self.storage.timings["read"])
+        self.report.add("parse", self.storage.timings["parse"])
+
+        build_time = 0.0
+        items = list(records.items())
+        for start in range(0, len(items), self.batch_size):
+            started = time.perf_counter()
+            for uid, data in items[start:start + self.batch_size]:
+                try:
+                    self.build_card(uid, data)
+                except Exception as e:
+                    self.errors.append(f"Failed to load timer {data.get('name', uid)!r}: {e}")
+            if self.on_batch is not None:
+                self.on_batch()
+            build_time += time.perf_counter() - started
+            await asyncio.sleep(0)
+        self.report.add("card build", build_time)
+        self.report.mark("hydrated")
+        self.done = True
+        return self.errors
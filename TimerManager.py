@@ -1,30 +1,366 @@
+import asyncio
+import heapq
 import threading
 import time
+from collections import deque, namedtuple
+
+from Clock import system_clock
+from Metrics import metrics
+from Profiler import profiler
+
+# What a TimerStore's key binding is subscribed to the InputHub as, in place of a timer id
+_StoreKey = namedtuple('_StoreKey', 'store_id key')
 
 
 class TimerManager:
-    def __init__(self):
+    """
+    Runs timers from a min-heap of deadlines instead of polling.
+
+    Heap entries are (deadline, generation, timer_id); rescheduling a timer bumps its
+    generation, so stale entries are skipped. Only the scheduler thread touches the heap
+    and the timers: every other method queues a command and wakes it, and it applies them
+    between ticks, so callers never wait on a tick. `timers` and `groups` are snapshots
+    replaced whole on each change, so any thread can read them but they may lag commands.
+    """
+
+    def __init__(self, input_hub=None, clock=None):
+        # Should be the clock the timers use
+        self.clock = clock or system_clock
+        # A TraceRecorder that every addition, removal, reset and fire is written to
+        self.trace = None
         self.timers = {}
+        # Group name -> frozenset of the registered timer ids added under it
+        self.groups = {}
         self.running = True
-        self.timers_lock = threading.Lock()
+        self.commands = deque()
+        self._wakeup = threading.Event()
+        # Scheduler-owned state, published to the snapshots above after each change
+        self._timers = {}
+        self._group_of = {}
+        self._heap = []
+        self._generation = {}
+        # Timer id -> [(loop, future)] from wait_triggered
+        self._trigger_waiters = {}
+        # Times the scheduler thread has woken up, for measuring idle behaviour
+        self.wakeups = 0
+        self.parked = False
+        # Timers with a bound key are subscribed to the hub while registered, and a press resets them
+        self.input_hub = input_hub
+        if input_hub is not None:
+            input_hub.on_key = self.manual_reset
+
+    def _submit(self, *command):
+        # deque append and popleft are atomic, so no lock is taken; queued_at feeds command_wait_seconds
+        self.commands.append((time.perf_counter() if metrics.enabled else None, command))
+        self._wake()
 
-    def add_timer(self, timer, timer_id):
-        with self.timers_lock:
-            self.timers[timer_id] = timer
+    def _wake(self):
+        self._wakeup.set()
+
+    def add_timer(self, timer, timer_id, group=None):
+        self._submit('add', [(timer_id, timer)], group, False)
 
     def remove_timer(self, timer_id):
-        with self.timers_lock:
-            if timer_id in self.timers:
-                del self.timers[timer_id]
+        self._submit('remove', [timer_id])
+
+    def add_timers(self, timers, group=None):
+        """
+        Register (timer_id, timer) pairs in one go, all starting from the same instant.
+
+        Timers should already be built, so their sounds are decoded before any of them
+        is visible to the scheduler. Timers added with a group name can later be stopped or
+        reset together with stop_group and reset_group.
+        """
+        self._submit('add', list(timers), group, True)
+
+    def remove_timers(self, timer_ids):
+        """Unregister several timers at once; returns the ids that are currently registered."""
+        timer_ids = list(timer_ids)
+        self._submit('remove', timer_ids)
+        timers = self.timers
+        return [timer_id for timer_id in timer_ids if timer_id in timers]
+
+    def reset_many(self, timer_ids):
+        """Restart several timers from the same instant."""
+        self._submit('reset', list(timer_ids), None)
+
+    def stop_group(self, group):
+        """Unregister every timer in a group; returns the ids it currently has."""
+        return self.remove_timers(self.groups.get(group, ()))
+
+    def reset_group(self, group):
+        self.reset_many(self.groups.get(group, ()))
+
+    def manual_reset(self, timer_id, pressed_at=None):
+        self._submit('reset', [timer_id], pressed_at)
+
+    def reschedule(self, timer_id):
+        self._submit('reschedule', timer_id)
+
+    async def wait_triggered(self, timer_id):
+        """
+        Wait until a registered timer is due; raises KeyError if it isn't or gets removed.
+
+        Works from whichever event loop it is awaited on.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._submit('wait', timer_id, loop, future)
+        return await future
+
+    def add_store(self, store, store_id='store'):
+        """
+        Schedule a whole TimerStore as one entry; it is ticked in a single pass when due.
+
+        From then on the store's slot changes (add, remove, reset_slot, stop) are queued
+        as commands, so only the scheduler thread touches its columns. A key press resets
+        the store's timers added with that key.
+        """
+        store.submit = lambda function, args: self._submit('store', store_id, function, args)
+        store.on_new_key = lambda key: self._submit('bind', store_id, key)
+        self.add_timer(store, store_id)
+
+    def stop(self):
+        self.running = False
+        self._wake()
+
+    def step(self):
+        """
+        Apply queued commands and run whatever is due now, without waiting.
 
-    def manual_reset(self, timer_id):
-        with self.timers_lock:
-            if timer_id in self.timers:
-                self.timers[timer_id].reset()
+        Returns the next deadline, or None if nothing is scheduled. For driving the
+        manager from outside instead of run(), e.g. on a VirtualClock (see Simulation).
+        """
+        self._apply_commands()
+        if self._heap and self._heap[0][0] <= self.clock.monotonic():
+            self._tick()
+        return self._heap[0][0] if self._heap else None
 
     def run(self):
+        """
+        Sleep until the earliest deadline or the next command, until stop() is called.
+
+        With nothing scheduled the loop is parked: it waits on commands alone, with no
+        timeout, and the next command re-arms it at once.
+        """
         while self.running:
-            with self.timers_lock:
-                for timer in list(self.timers.values()):
+            self._apply_commands()
+            delay = None
+            if self._heap:
+                delay = self._heap[0][0] - self.clock.monotonic()
+                if delay <= 0:
+                    self._tick()
+                    continue
+            self.parked = delay is None
+            self._wakeup.wait(delay)
+            self.parked = False
+            # Commands queued before this clear are applied at the top of the loop
+            self._wakeup.clear()
+            self.wakeups += 1
+
+    def _tick(self):
+        # Runs every entry due now, but not ones they reschedule for now: those are only
+        # pushed back once the due entries have all been taken off the heap, so a timer
+        # that stays due can't keep the tick going (on a VirtualClock, forever)
+        started = time.perf_counter() if metrics.enabled else None
+        trace = self.trace
+        now = self.clock.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, generation, timer_id = heapq.heappop(self._heap)
+            if self._generation.get(timer_id) != generation:
+                continue  # stale entry for a removed or rescheduled timer
+            due.append(timer_id)
+        for timer_id in due:
+            if not self.running:
+                self._schedule(timer_id)
+                continue
+            timer = self._timers[timer_id]
+            try:
+                if timer_id in self._trigger_waiters and timer.isTriggered():
+                    self._release_waiters(timer_id)
+                span_started = time.perf_counter() if profiler.active else None
+                if trace is None:
                     timer.checkAndRun()
-            time.sleep(0.1)
+                else:
+                    trace.run(timer_id, timer)
+                if span_started is not None:
+                    profiler.add_span('checkAndRun', span_started)
+                self._schedule(timer_id)
+            except Exception as e:
+                self._drop(timer_id, e)
+        if started is not None:
+            metrics.record('tick_seconds', time.perf_counter() - started)
+
+    def _schedule(self, timer_id):
+        generation = self._generation.get(timer_id, 0) + 1
+        self._generation[timer_id] = generation
+        due = self._timers[timer_id].next_due()
+        if due is not None:
+            heapq.heappush(self._heap, (due, generation, timer_id))
+
+    def _apply_commands(self):
+        changed = False
+        while self.commands:
+            queued_at, (name, *args) = self.commands.popleft()
+            # A failing command is dropped; the scheduler thread has to outlive it
+            try:
+                if name == 'add':
+                    changed = True
+                    self._add(*args)
+                elif name == 'remove':
+                    changed = self._remove(*args) or changed
+                elif name == 'reset':
+                    self._reset(*args)
+                elif name == 'wait':
+                    self._wait(*args)
+                elif name == 'bind':
+                    self._bind(*args)
+                elif name == 'store':
+                    self._change_store(*args)
+                elif self._timers.get(args[0]) is not None:  # reschedule
+                    self._schedule(args[0])
+            except Exception as e:
+                print(f"Scheduler command {name!r} failed: {e!r}")
+                if name == 'wait':
+                    _, loop, future = args
+                    loop.call_soon_threadsafe(_resolve, future, None, e)
+            if queued_at is not None:
+                metrics.record('command_wait_seconds', time.perf_counter() - queued_at)
+        if changed:
+            self._publish()
+
+    def _publish(self):
+        self.timers = dict(self._timers)
+        groups = {}
+        for timer_id, group in self._group_of.items():
+            groups.setdefault(group, set()).add(timer_id)
+        self.groups = {group: frozenset(members) for group, members in groups.items()}
+
+    def _drop(self, timer_id, error):
+        # One broken timer, e.g. with no interval, mustn't take the others down with the thread
+        print(f"Timer {timer_id!r} failed and was removed: {error!r}")
+        self._remove([timer_id])
+        self._publish()
+
+    def _add(self, timers, group, restart):
+        now = self.clock.monotonic()
+        for timer_id, timer in timers:
+            old = self._timers.get(timer_id)
+            if old is not None and self.input_hub is not None:
+                for key, subscriber in _key_bindings(timer_id, old):
+                    self.input_hub.unsubscribe(key, subscriber)
+            self._timers[timer_id] = timer
+            self._group_of.pop(timer_id, None)
+            if group is not None:
+                self._group_of[timer_id] = group
+            try:
+                if restart:
+                    timer.reset(now)
+                self._schedule(timer_id)
+            except Exception as e:
+                self._drop(timer_id, e)
+                continue
+            if self.trace is not None:
+                self.trace.added(timer_id, timer, group)
+            if self.input_hub is not None:
+                for key, subscriber in _key_bindings(timer_id, timer):
+                    self.input_hub.subscribe(key, subscriber)
+
+    def _remove(self, timer_ids):
+        removed = False
+        for timer_id in timer_ids:
+            timer = self._timers.pop(timer_id, None)
+            if timer is None:
+                continue
+            removed = True
+            # Any heap entries left behind are dropped lazily by _tick()
+            self._generation.pop(timer_id, None)
+            self._group_of.pop(timer_id, None)
+            if timer_id in self._trigger_waiters:
+                self._release_waiters(timer_id, KeyError(timer_id))
+            if self.trace is not None:
+                self.trace.removed(timer_id)
+            if self.input_hub is not None:
+                for key, subscriber in _key_bindings(timer_id, timer):
+                    self.input_hub.unsubscribe(key, subscriber)
+            if _is_store(timer):
+                timer.submit = None  # nothing schedules it any more, so changes apply directly
+        if not self._timers:
+            self._heap.clear()
+        return removed
+
+    def _reset(self, timer_ids, pressed_at):
+        now = self.clock.monotonic()
+        for timer_id in timer_ids:
+            if isinstance(timer_id, _StoreKey):
+                self._reset_store_key(timer_id, pressed_at)
+                continue
+            timer = self._timers.get(timer_id)
+            if timer is None:
+                continue
+            try:
+                timer.reset(now)
+                self._schedule(timer_id)
+            except Exception as e:
+                self._drop(timer_id, e)
+                continue
+            if self.trace is not None:
+                self.trace.reset(timer_id)
+            if pressed_at is not None:
+                metrics.record('key_to_reset_seconds', time.perf_counter() - pressed_at,
+                               timer=getattr(timer, 'uid', None) or timer_id,
+                               timer_name=getattr(timer, 'timer_name', None))
+
+    def _reset_store_key(self, store_key, pressed_at):
+        store = self._timers.get(store_key.store_id)
+        if store is None:
+            return
+        store.reset_key(store_key.key)
+        self._schedule(store_key.store_id)
+        if pressed_at is not None:
+            metrics.record('key_to_reset_seconds', time.perf_counter() - pressed_at, timer=store_key.store_id)
+
+    def _change_store(self, store_id, function, args):
+        # A slot added, removed, reset or stopped from another thread, applied between passes
+        function(*args)
+        if store_id in self._timers:
+            self._schedule(store_id)
+
+    def _bind(self, store_id, key):
+        # A key first used by a store after it was added
+        if self.input_hub is not None and store_id in self._timers:
+            self.input_hub.subscribe(key, _StoreKey(store_id, key))
+
+    def _wait(self, timer_id, loop, future):
+        timer = self._timers.get(timer_id)
+        if timer is None:
+            loop.call_soon_threadsafe(_resolve, future, None, KeyError(timer_id))
+        elif timer.isTriggered():
+            loop.call_soon_threadsafe(_resolve, future, None, None)
+        else:
+            self._trigger_waiters.setdefault(timer_id, []).append((loop, future))
+
+    def _release_waiters(self, timer_id, error=None):
+        for loop, future in self._trigger_waiters.pop(timer_id):
+            loop.call_soon_threadsafe(_resolve, future, None, error)
+
+
+def _key_bindings(timer_id, timer):
+    """(key, subscriber) pairs a registered timer or TimerStore takes on the InputHub."""
+    if _is_store(timer):
+        return [(key, _StoreKey(timer_id, key)) for key in timer.keys()]
+    return [(timer.key, timer_id)] if timer.key is not None else []
+
+
+def _is_store(timer):
+    return hasattr(timer, 'reset_key')
+
+
+def _resolve(future, value, error):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
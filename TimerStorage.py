@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SNAPSHOT_NAME = "timers.json"
+JOURNAL_NAME = "timers.journal"
+LEGACY_FOLDER = "legacy"
+
+
+def new_timer_id() -> str:
+    return uuid.uuid4().hex
+
+
+def atomic_write(path: Path, text: str):
+    """Write text to path so that readers only ever see the old or the new contents."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(folder: Path):
+    # Makes the rename itself durable; directories can't be opened like this on Windows
+    if os.name == 'nt':
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _dumps(record) -> str:
+    return json.dumps(record, separators=(',', ':'))
+
+
+class TimerStorage:
+    """
+    Saved timers as one snapshot file plus an append-only journal of changes.
+
+    Timers are keyed by a stable id, and save() only appends journal records for timers
+    that were added, changed or removed since the last save. Every journal record has a
+    sequence number and the snapshot remembers the last one it contains, so replaying
+    after a crash at any point - including mid-compaction - gives the saved state. Once the
+    journal passes compact_after records it is folded into a new snapshot on a background
+    thread. A folder of old per-timer timer_N.json files is migrated on first load.
+    """
+
+    def __init__(self, folder, compact_after=500):
+        self.folder = Path(folder)
+        self.snapshot_path = self.folder / SNAPSHOT_NAME
+        self.journal_path = self.folder / JOURNAL_NAME
+        self.compact_after = compact_after
+        self.records = {}
+        self.errors = []
+        # Seconds spent reading and parsing in the last load()
+        self.timings = {"read": 0.0, "parse": 0.0}
+        self._seq = 0
+        self._tail = []
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def load(self):
+        """Return the saved timers as an ordered dict of id -> timer data."""
+        with self._lock:
+            self.records = {}
+            self._tail = []
+            self.errors = []
+            self.timings = {"read": 0.0, "parse": 0.0}
+            if not self.snapshot_path.exists() and not self.journal_path.exists():
+                self._migrate_legacy()
+                return dict(self.records)
+
+            started = time.perf_counter()
+            snapshot_text = _read_text(self.snapshot_path)
+            journal_text = _read_text(self.journal_path)
+            read_done = time.perf_counter()
+
+            snapshot_seq = 0
+            if snapshot_text:
+                try:
+                    snapshot = json.loads(snapshot_text)
+                    snapshot_seq = snapshot.get("seq", 0)
+                    self.records = dict(snapshot.get("timers", {}))
+                except (ValueError, AttributeError, TypeError) as e:
+                    # Keep the damaged file for recovery and fall back to whatever the journal holds
+                    moved_to = self._move_aside(self.snapshot_path)
+                    self.errors.append(f"Failed to read {self.snapshot_path}: {e}; moved it to {moved_to} "
+                                       f"and loaded only the timers in {self.journal_path.name}")
+                    snapshot_seq = 0
+                    self.records = {}
+            self._seq = snapshot_seq
+
+            for line in journal_text.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; nothing after it was acknowledged
+                    self.errors.append(f"Ignored damaged journal line: {line[:80]!r}")
+                    break
+                if record["seq"] <= snapshot_seq:
+                    continue
+                self._apply(record)
+                self._tail.append(record)
+                self._seq = record["seq"]
+
+            self.timings = {"read": read_done - started, "parse": time.perf_counter() - read_done}
+            return dict(self.records)
+
+    def save(self, timers):
+        """
+        Persist timers (id -> timer data), writing only what changed since the last save.
+
+        Returns the number of journal records written.
+        """
+        with self._lock:
+            changes = []
+            for timer_id, data in timers.items():
+                if self.records.get(timer_id) != data:
+                    changes.append({"op": "put", "id": timer_id, "timer": data})
+            for timer_id in self.records.keys() - timers.keys():
+                changes.append({"op": "delete", "id": timer_id})
+            if not changes:
+                return 0
+
+            for record in changes:
+                self._seq += 1
+                record["seq"] = self._seq
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(_dumps(record) + "\n" for record in changes))
+                f.flush()
+                os.fsync(f.fileno())
+
+            for record in changes:
+                self._apply(record)
+            self._tail.extend(changes)
+            if len(self._tail) >= self.compact_after:
+                self._start_compaction()
+            return len(changes)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot."""
+        with self._lock:
+            records = dict(self.records)
+            seq = self._seq
+
+        atomic_write(self.snapshot_path, _dumps({"version": 1, "seq": seq, "timers": records}))
+
+        with self._lock:
+            # Keep whatever was appended while the snapshot was being written
+            self._tail = [record for record in self._tail if record["seq"] > seq]
+            atomic_write(self.journal_path, "".join(_dumps(record) + "\n" for record in self._tail))
+            self._compactor = None
+
+    def _start_compaction(self):
+        if self._compactor is not None:
+            return
+        self._compactor = threading.Thread(target=self.compact, name='storage-compactor', daemon=True)
+        self._compactor.start()
+
+    def _apply(self, record):
+        if record["op"] == "put":
+            self.records[record["id"]] = record["timer"]
+        else:
+            self.records.pop(record["id"], None)
+
+    def _move_aside(self, path: Path) -> Path:
+        legacy_folder = self.folder / LEGACY_FOLDER
+        legacy_folder.mkdir(exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        target = legacy_folder / f"{path.name}.{stamp}.damaged"
+        if target.exists():
+            target = legacy_folder / f"{path.name}.{stamp}-{new_timer_id()[:8]}.damaged"
+        os.replace(path, target)
+        return target
+
+    def _migrate_legacy(self, workers=8):
+        legacy_files = sorted(self.folder.glob("*.json"), key=lambda p: (len(p.stem), p.stem))
+        if not legacy_files:
+            return
+
+        started = time.perf_counter()
+        # One small file per timer, so reading them concurrently hides the per-file latency
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            contents = list(pool.map(_read_legacy, legacy_files))
+        read_done = time.perf_counter()
+
+        for file, text in zip(legacy_files, contents):
+            try:
+                if isinstance(text, Exception):
+                    raise text
+                self.records[new_timer_id()] = json.loads(text)
+            except Exception as e:
+                self.errors.append(f"Failed to read {file}: {e}")
+        self.timings = {"read": read_done - started, "parse": time.perf_counter() - read_done}
+
+        atomic_write(self.snapshot_path, _dumps({"version": 1, "seq": 0, "timers": self.records}))
+        # Only move the old files aside once the snapshot holding them is durable
+        legacy_folder = self.folder / LEGACY_FOLDER
+        legacy_folder.mkdir(exist_ok=True)
+        for file in legacy_files:
+            os.replace(file, legacy_folder / file.name)
+
+
+def _read_text(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def _read_legacy(path: Path):
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError as e:
+        return e
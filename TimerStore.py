@@ -0,0 +1,269 @@
+import threading
+from array import array
+
+from Clock import system_clock
+from Timer import advance_deadline
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the array module is used instead
+    np = None
+
+RUNNING = 1
+# Set on slots that were removed and wait on the free list to be reused
+FREE = 2
+
+_COLUMNS = {
+    'interval': 'd',
+    'last_trigger': 'd',
+    'last_sound': 'd',
+    'sound_time': 'd',
+    'flags': 'B',
+    'key_id': 'i',
+}
+
+
+class TimerStore:
+    """
+    Struct-of-arrays storage for large fleets of lightweight timers.
+
+    Every timer is one slot across a set of columns (interval, last trigger, last sound,
+    sound time, flags and key id), so a timer costs a few dozen bytes instead of a full
+    Timer object. Expiry for the whole store is computed in one pass per tick - vectorized
+    when numpy is installed. The store follows the same next_due/checkAndRun/reset/
+    isTriggered protocol as Timer, for the whole store at once, so a TimerManager
+    schedules it like a single timer (see TimerManager.add_store). Timers without a key
+    are phase-locked, skipping missed periods like Timer's 'skip'.
+
+    Slots are handed out by add() straight away, but the columns are only changed through
+    submit(function, args) when it is set: add_store points it at the manager, so every
+    change lands on the scheduler thread between passes. The protocol methods and
+    reset_key are for whoever schedules the store.
+
+    on_fire(slots) is called from checkAndRun with the slots whose sound is due, and
+    on_new_key(key) the first time a timer is added with a key, so whoever owns the
+    keyboard can route that key's presses to reset_key (TimerManager.add_store does).
+    """
+
+    def __init__(self, capacity=64, on_fire=None, clock=None):
+        self.on_fire = on_fire
+        self.clock = clock or system_clock
+        self.submit = None
+        self.on_new_key = None
+        self.key = None
+        self.size = 0
+        self._capacity = 0
+        # Slot and key id bookkeeping for add(), which may run on any thread
+        self._lock = threading.Lock()
+        self._slots_handed_out = 0
+        self._free = []
+        self._key_ids = {}
+        for name, typecode in _COLUMNS.items():
+            setattr(self, name, _new_column(typecode, 0))
+        self._grow(capacity)
+
+    def add(self, interval, sound_time=5, key=None, start=None):
+        """Add a timer and return a TimerHandle for it."""
+        now = self.clock.monotonic() if start is None else start
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = self._slots_handed_out
+                self._slots_handed_out += 1
+        key_id = self.key_id_for(key) if key is not None else -1
+        self._change(self._fill, slot, interval, sound_time, now, key_id)
+        return TimerHandle(self, slot)
+
+    def remove(self, slot):
+        self._change(self._free_slot, slot)
+
+    def key_id_for(self, key):
+        with self._lock:
+            key_id = self._key_ids.get(str(key))
+            new = key_id is None
+            if new:
+                key_id = self._key_ids[str(key)] = len(self._key_ids)
+        if new and self.on_new_key is not None:
+            self.on_new_key(str(key))
+        return key_id
+
+    def keys(self):
+        """Every key timers have been added with, as str(key)."""
+        return list(self._key_ids)
+
+    def reset_slot(self, slot):
+        self._change(self._reset_slot, slot, self.clock.monotonic())
+
+    def reset(self, now=None):
+        """Restart every running timer in the store from now."""
+        now = self.clock.monotonic() if now is None else now
+        n = self.size
+        if np is not None:
+            self.last_trigger[:n][(self.flags[:n] & RUNNING) != 0] = now
+        else:
+            for slot in range(n):
+                if self.flags[slot] & RUNNING:
+                    self.last_trigger[slot] = now
+
+    def reset_key(self, key):
+        """Reset every timer bound to key in one pass."""
+        key_id = self._key_ids.get(str(key))
+        if key_id is None:
+            return
+        now = self.clock.monotonic()
+        if np is not None:
+            n = self.size
+            bound = (self.key_id[:n] == key_id) & ((self.flags[:n] & RUNNING) != 0)
+            self.last_trigger[:n][bound] = now
+        else:
+            for slot in range(self.size):
+                if self.key_id[slot] == key_id and self.flags[slot] & RUNNING:
+                    self.last_trigger[slot] = now
+
+    def stop(self, slot):
+        self._change(self._stop, slot)
+
+    def isTriggered(self):
+        """Whether any running timer in the store is due."""
+        now = self.clock.monotonic()
+        n = self.size
+        if np is not None:
+            running = (self.flags[:n] & RUNNING) != 0
+            return bool((running & (now >= self.last_trigger[:n] + self.interval[:n])).any())
+        return any(self.flags[i] & RUNNING and now >= self.last_trigger[i] + self.interval[i] for i in range(n))
+
+    def slot_triggered(self, slot):
+        if not self.flags[slot] & RUNNING:
+            return False
+        # Compared the way next_due() adds up deadlines, so both agree despite float rounding
+        return self.clock.monotonic() >= self.last_trigger[slot] + self.interval[slot]
+
+    def remaining(self, now=None):
+        """Seconds left per slot, clamped at zero, for the whole store at once."""
+        now = self.clock.monotonic() if now is None else now
+        n = self.size
+        if np is not None:
+            return np.maximum(self.interval[:n] + self.last_trigger[:n] - now, 0)
+        return array('d', (max(self.interval[i] + self.last_trigger[i] - now, 0) for i in range(n)))
+
+    def next_due(self):
+        n = self.size
+        if np is not None:
+            running = (self.flags[:n] & RUNNING) != 0
+            if not running.any():
+                due = None
+            else:
+                deadline = self.last_trigger[:n] + self.interval[:n]
+                triggered = deadline <= self.clock.monotonic()
+                repeat = self.last_sound[:n] + self.sound_time[:n]
+                due = float(np.where(triggered, repeat, deadline)[running].min())
+        else:
+            now = self.clock.monotonic()
+            due = None
+            for i in range(n):
+                if not self.flags[i] & RUNNING:
+                    continue
+                deadline = self.last_trigger[i] + self.interval[i]
+                if deadline <= now:
+                    deadline = self.last_sound[i] + self.sound_time[i]
+                if due is None or deadline < due:
+                    due = deadline
+        return due
+
+    def checkAndRun(self):
+        now = self.clock.monotonic()
+        n = self.size
+        if np is not None:
+            running = (self.flags[:n] & RUNNING) != 0
+            triggered = running & (now >= self.last_trigger[:n] + self.interval[:n])
+            fired = np.flatnonzero(triggered & (now >= self.last_sound[:n] + self.sound_time[:n]))
+            self.last_sound[fired] = now
+            # Key-less slots are phase-locked like a Timer's: advance_deadline's skip policy,
+            # for every slot at once
+            keyless = fired[self.key_id[fired] < 0]
+            interval = self.interval[keyless]
+            deadline = self.last_trigger[keyless] + interval
+            self.last_trigger[keyless] = deadline + np.floor((now - deadline) / interval) * interval
+        else:
+            fired = []
+            for i in range(n):
+                if not self.flags[i] & RUNNING:
+                    continue
+                if now >= self.last_trigger[i] + self.interval[i] and now >= self.last_sound[i] + self.sound_time[i]:
+                    self.last_sound[i] = now
+                    if self.key_id[i] < 0:
+                        deadline = self.last_trigger[i] + self.interval[i]
+                        self.last_trigger[i] = advance_deadline(deadline, self.interval[i], now) - self.interval[i]
+                    fired.append(i)
+
+        if len(fired) and self.on_fire is not None:
+            self.on_fire(fired)
+
+    def _change(self, function, *args):
+        # Straight away for a store nothing schedules, else queued for the scheduler thread
+        if self.submit is None:
+            function(*args)
+        else:
+            self.submit(function, args)
+
+    def _fill(self, slot, interval, sound_time, now, key_id):
+        if slot >= self._capacity:
+            self._grow(max(self._capacity * 2, slot + 1))
+        self.size = max(self.size, slot + 1)
+        self.interval[slot] = interval
+        self.sound_time[slot] = sound_time
+        self.last_trigger[slot] = now
+        self.last_sound[slot] = now
+        self.flags[slot] = RUNNING
+        self.key_id[slot] = key_id
+
+    def _free_slot(self, slot):
+        if self.flags[slot] & FREE:
+            return  # already removed; freeing it twice would hand it to two timers
+        self.flags[slot] = FREE
+        with self._lock:
+            self._free.append(slot)
+
+    def _reset_slot(self, slot, now):
+        self.last_trigger[slot] = now
+
+    def _stop(self, slot):
+        self.flags[slot] &= 0xFF ^ RUNNING
+
+    def _grow(self, capacity):
+        capacity = max(capacity, 1)
+        for name, typecode in _COLUMNS.items():
+            old = getattr(self, name)
+            column = _new_column(typecode, capacity)
+            column[:self._capacity] = old[:self._capacity]
+            setattr(self, name, column)
+        self._capacity = capacity
+
+
+class TimerHandle:
+    """Thin per-timer view onto a TimerStore slot with the familiar Timer methods."""
+
+    __slots__ = ('store', 'slot')
+
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    def reset(self):
+        self.store.reset_slot(self.slot)
+
+    def stop(self):
+        self.store.stop(self.slot)
+
+    def isTriggered(self):
+        return self.store.slot_triggered(self.slot)
+
+    def remove(self):
+        self.store.remove(self.slot)
+
+
+def _new_column(typecode, length):
+    if np is not None:
+        return np.zeros(length, dtype=typecode)
+    return array(typecode, [0]) * length
@@ -0,0 +1,107 @@
+import json
+
+from Clock import system_clock
+
+# Events a trace is replayed from; fire events are what a run produces
+INPUT_EVENTS = ('add', 'remove', 'reset', 'key')
+
+
+class TraceRecorder:
+    """
+    Records what a TimerManager does as trace events, one JSON object per line.
+
+    Every event has "t", seconds since the recorder was created, "event" and "timer":
+        add     also interval, key, sound, sound_time, catch_up, name, group,
+                started (when the timer's current period began) and sounded (when its
+                sound last went off), both in trace seconds
+        remove
+        reset   a key press or a reset from the UI
+        fire    the timer's sound or notification went off
+    Scripts for a Simulation may also use {"t", "event": "key", "key"} to press a key,
+    which resets every timer added with that key.
+
+    emit is called with each event as a dict; to_file() builds a recorder that writes
+    them to a file. The manager only calls the recorder from its scheduler.
+    """
+
+    def __init__(self, emit, clock=None, close=None):
+        self.emit = emit
+        self.clock = clock or system_clock
+        self.start = self.clock.monotonic()
+        self._close = close
+
+    @classmethod
+    def to_file(cls, path, clock=None):
+        trace_file = open(path, 'w', encoding='utf-8')
+        return cls(lambda event: trace_file.write(json.dumps(event) + "\n"), clock, trace_file.close)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def now(self):
+        return round(self.clock.monotonic() - self.start, 6)
+
+    def added(self, timer_id, timer, group=None):
+        event = {'t': self.now(), 'event': 'add', 'timer': timer_id}
+        if hasattr(timer, 'timer_name'):  # a TimerStore is only recorded as present
+            event.update(interval=timer.interval,
+                         key=str(timer.key) if timer.key is not None else None,
+                         sound=timer.sound_path is not None,
+                         sound_time=timer.sound_time,
+                         catch_up=timer.catch_up,
+                         name=timer.timer_name,
+                         group=group,
+                         started=round(timer.last_trigger - self.start, 6),
+                         sounded=round(timer.last_sound - self.start, 6))
+        self.emit(event)
+
+    def removed(self, timer_id):
+        self.emit({'t': self.now(), 'event': 'remove', 'timer': timer_id})
+
+    def reset(self, timer_id):
+        self.emit({'t': self.now(), 'event': 'reset', 'timer': timer_id})
+
+    def run(self, timer_id, timer):
+        """Run timer.checkAndRun() and record a fire if its sound went off."""
+        fires = getattr(timer, 'fires', None)
+        timer.checkAndRun()
+        if getattr(timer, 'fires', None) != fires:
+            self.emit({'t': self.now(), 'event': 'fire', 'timer': timer_id})
+
+
+def read_trace(path):
+    """Load a trace file's events, skipping blank lines."""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_fires(expected, actual, tolerance=0.5):
+    """
+    Differences between the fire events of two traces, as readable lines.
+
+    Fires are matched per timer, in order; an empty list means every timer fired the
+    same number of times and each fire is within tolerance seconds of its counterpart.
+    """
+    expected_fires = _fires_by_timer(expected)
+    actual_fires = _fires_by_timer(actual)
+    differences = []
+    for timer_id in sorted(expected_fires.keys() | actual_fires.keys(), key=str):
+        wanted = expected_fires.get(timer_id, [])
+        got = actual_fires.get(timer_id, [])
+        for index, (want, have) in enumerate(zip(wanted, got)):
+            if abs(want - have) > tolerance:
+                differences.append(f"timer {timer_id}: fire {index + 1} at {have:.3f} s, expected {want:.3f} s")
+                break
+        if len(wanted) != len(got):
+            differences.append(f"timer {timer_id}: {len(got)} fires, expected {len(wanted)}")
+    return differences
+
+
+def _fires_by_timer(events):
+    fires = {}
+    for event in events:
+        if event['event'] == 'fire':
+            fires.setdefault(event['timer'], []).append(event['t'])
+    return fires
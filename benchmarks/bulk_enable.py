@@ -0,0 +1,84 @@
+"""
+Compares enabling a group of timers one by one with TimerManager.add_timers.
+
+Reports the wall time to enable the whole group and the spread between the earliest and
+latest start time, which add_timers should bring to zero.
+
+    python benchmarks/bulk_enable.py [--timers 300] [--decode-ms 20]
+"""
+import argparse
+import threading
+import time
+
+from fakes import SOUND_PATH, FakeCard, FakeListener, FakeSound, fake_sound_bytes
+import Timer as timer_module
+from InputHub import InputHub
+from SoundCache import SoundCache
+from TimerManager import TimerManager
+
+
+def slow_sound(path, decode_seconds):
+    time.sleep(decode_seconds)
+    return FakeSound(path)
+
+
+def build(count, key_every=4):
+    return [(i, timer_module.Timer(60, FakeCard(), key="'a'" if i % key_every == 0 else None,
+                                   sound_path=SOUND_PATH))
+            for i in range(count)]
+
+
+def start_manager():
+    manager = TimerManager(InputHub(listener_factory=FakeListener))
+    threading.Thread(target=manager.run, daemon=True).start()
+    return manager
+
+
+def wait_applied(manager, count):
+    # Changes are applied by the scheduler thread, so enabling isn't done until they show up
+    while len(manager.timers) < count:
+        time.sleep(0.0005)
+
+
+def one_by_one(count):
+    manager = start_manager()
+    started = time.perf_counter()
+    for timer_id, timer in build(count):
+        manager.add_timer(timer, timer_id)
+    wait_applied(manager, count)
+    return time.perf_counter() - started, manager
+
+
+def batched(count):
+    manager = start_manager()
+    started = time.perf_counter()
+    timer_module.sound_cache.prewarm([(SOUND_PATH, None)])
+    manager.add_timers(build(count), group="bench")
+    wait_applied(manager, count)
+    return time.perf_counter() - started, manager
+
+
+def start_spread(manager):
+    starts = [timer.last_trigger for timer in manager.timers.values()]
+    return max(starts) - min(starts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=300)
+    parser.add_argument("--decode-ms", type=float, default=20, help="simulated decode time per sound")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'enable ms':>10} {'start spread ms':>16}")
+    for name, enable in (("one by one", one_by_one), ("add_timers", batched)):
+        # A fresh cache per mode so both pay for the decode once
+        timer_module.sound_cache = SoundCache(loader=lambda path, trim_seconds=None: slow_sound(path, args.decode_ms / 1000),
+                                              sizer=fake_sound_bytes)
+        elapsed, manager = enable(args.timers)
+        print(f"{name:<12} {elapsed * 1000:>10.1f} {start_spread(manager) * 1000:>16.3f}")
+        manager.stop()
+        manager.input_hub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Load test for the control API against a local server.
+
+Serves ControlApi on its own FastAPI app, backed by a real TimerManager running fake
+timers, then has --clients threads post reset, enable and disable batches of --batch ids
+as fast as they can while a WebSocket subscriber follows the state stream. Reports
+requests and commands per second, how many batches the commands were coalesced into,
+and how many stream messages the subscriber got.
+
+    python benchmarks/control_api.py [--timers 1000] [--seconds 5] [--clients 4] [--batch 20]
+"""
+import argparse
+import random
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from websockets.sync.client import connect
+
+from fakes import SOUND_PATH, FakeCard, install_fakes
+import Timer as timer_module
+from ControlApi import ControlApi
+from TimerManager import TimerManager
+
+
+class FakeController:
+    """What main.py does for the API, with timers kept in a dict instead of cards."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.specs = {}
+        self.enabled = set()
+
+    def create(self, specs):
+        ids = []
+        for spec in specs:
+            timer_id = f"t{len(self.specs)}"
+            self.specs[timer_id] = spec
+            ids.append(timer_id)
+        return ids
+
+    def reset(self, ids):
+        self.manager.reset_many([timer_id for timer_id in ids if timer_id in self.enabled])
+
+    async def enable(self, ids):
+        ids = [timer_id for timer_id in ids if timer_id in self.specs and timer_id not in self.enabled]
+        self.manager.add_timers([(timer_id, timer_module.Timer(self.specs[timer_id].interval, FakeCard(),
+                                                               sound_path=SOUND_PATH))
+                                 for timer_id in ids])
+        self.enabled.update(ids)
+
+    def disable(self, ids):
+        ids = [timer_id for timer_id in ids if timer_id in self.enabled]
+        self.manager.remove_timers(ids)
+        self.enabled.difference_update(ids)
+
+    def states(self):
+        now = time.monotonic()
+        running = self.manager.timers
+        states = {}
+        for timer_id in self.specs:
+            timer = running.get(timer_id)
+            states[timer_id] = (None, False) if timer is None else \
+                (max(0, round(timer.last_trigger + timer.interval - now)), timer.isTriggered())
+        return states
+
+
+def serve(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def client(base, ids, batch, stop, counts, seed):
+    rng = random.Random(seed)
+    with httpx.Client(base_url=base) as http:
+        while not stop.is_set():
+            action = rng.choice(("reset", "reset", "enable", "disable"))
+            response = http.post(f"/api/timers/{action}", json={"ids": rng.sample(ids, batch)})
+            response.raise_for_status()
+            counts["requests"] += 1
+            counts["commands"] += batch
+
+
+def subscriber(url, stop, counts):
+    with connect(url) as websocket:
+        while not stop.is_set():
+            try:
+                websocket.recv(timeout=0.5)
+            except TimeoutError:
+                continue
+            counts["stream messages"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20, help="ids per request")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    install_fakes()
+    manager = TimerManager()
+    threading.Thread(target=manager.run, daemon=True).start()
+    api = ControlApi(FakeController(manager))
+    app = FastAPI()
+    api.mount(app)
+    server = serve(app, args.port)
+    base = f"http://127.0.0.1:{args.port}"
+
+    response = httpx.post(f"{base}/api/timers", timeout=30, json={"timers": [
+        {"name": f"Timer {i}", "interval": random.uniform(1, 10)} for i in range(args.timers)]})
+    ids = response.json()["ids"]
+
+    stop = threading.Event()
+    # One counter dict per thread, summed at the end
+    counts = [{"requests": 0, "commands": 0, "stream messages": 0} for _ in range(args.clients + 1)]
+    threads = [threading.Thread(target=subscriber, args=(f"ws://127.0.0.1:{args.port}/api/stream", stop, counts[0]))]
+    threads += [threading.Thread(target=client, args=(base, ids, args.batch, stop, counts[seed + 1], seed))
+                for seed in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    counts = {name: sum(thread_counts[name] for thread_counts in counts) for name in counts[0]}
+
+    print(f"{args.timers} timers, {args.clients} clients, {args.batch} ids per request")
+    print(f"requests/s         {counts['requests'] / elapsed:10.0f}")
+    print(f"commands/s         {counts['commands'] / elapsed:10.0f}")
+    print(f"applied batches    {api.flushes:10d} ({api.commands / max(api.flushes, 1):.0f} commands each)")
+    print(f"stream messages    {counts['stream messages']:10d}")
+    print(f"timers running     {len(manager.timers):10d}")
+
+    server.should_exit = True
+    manager.stop()
+    timer_module.audio_engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Simulates key-less timers over many cycles on a fake clock and checks they don't drift.
+
+Each cycle the scheduler notices the deadline up to --max-lateness seconds late, as a
+busy machine would. A phase-locked Timer must end exactly on start + cycles * interval;
+the old behaviour of restarting from the moment of observation is shown for comparison.
+Also checks the skip, burst and coalesce catch-up policies after a long stall.
+Exits 1 if any check fails.
+
+    python benchmarks/drift.py [--cycles 10000] [--interval 60] [--max-lateness 0.1]
+"""
+import argparse
+import random
+import sys
+
+from fakes import SOUND_PATH, FakeCard, install_fakes
+import Timer as timer_module
+from Clock import VirtualClock
+
+# Float rounding over the run; anything bigger is drift
+TOLERANCE = 1e-6
+
+
+def make_timer(clock, interval, catch_up='skip'):
+    timer = timer_module.Timer(interval, FakeCard(), sound_path=SOUND_PATH,
+                               sound_time=0, catch_up=catch_up, clock=clock)
+    fires = []
+    timer.play_sound = lambda: fires.append(clock.now)
+    return timer, fires
+
+
+def simulate_timer(cycles, interval, max_lateness, seed):
+    clock = VirtualClock(1000.0)
+    timer, fires = make_timer(clock, interval)
+    start = timer.last_trigger
+    rng = random.Random(seed)
+    for _ in range(cycles):
+        clock.now = timer.last_trigger + interval + rng.uniform(0, max_lateness)
+        timer.checkAndRun()
+    return timer.last_trigger - (start + cycles * interval), len(fires)
+
+
+def simulate_restart_on_observe(cycles, interval, max_lateness, seed):
+    # What reset() at the moment of observation did before
+    rng = random.Random(seed)
+    start = last_trigger = 1000.0
+    for _ in range(cycles):
+        last_trigger = last_trigger + interval + rng.uniform(0, max_lateness)
+    return last_trigger - (start + cycles * interval)
+
+
+def check_policies(interval):
+    failures = []
+    # The scheduler stalls for 3.5 periods past the first deadline
+    expected = {
+        'skip': (1, 1000.0 + 5 * interval),
+        'burst': (4, 1000.0 + 5 * interval),
+        'coalesce': (1, 1000.0 + 4.5 * interval + interval),
+    }
+    for policy, (expected_fires, expected_deadline) in expected.items():
+        clock = VirtualClock(1000.0)
+        timer, fires = make_timer(clock, interval, policy)
+        clock.now = 1000.0 + 4.5 * interval
+        # Run until nothing is due, as the scheduler would
+        while timer.next_due() <= clock.now and len(fires) < 100:
+            timer.checkAndRun()
+        deadline = timer.last_trigger + interval
+        ok = len(fires) == expected_fires and abs(deadline - expected_deadline) < TOLERANCE
+        print(f"{policy:<9} fires {len(fires)} (expected {expected_fires}), next deadline "
+              f"{deadline - 1000:.1f} (expected {expected_deadline - 1000:.1f})  {'ok' if ok else 'FAIL'}")
+        if not ok:
+            failures.append(policy)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=10_000)
+    parser.add_argument("--interval", type=float, default=60)
+    parser.add_argument("--max-lateness", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    install_fakes()
+    drift, fires = simulate_timer(args.cycles, args.interval, args.max_lateness, args.seed)
+    old_drift = simulate_restart_on_observe(args.cycles, args.interval, args.max_lateness, args.seed)
+    print(f"{args.cycles} cycles of {args.interval:g} s, noticed up to {args.max_lateness * 1000:.0f} ms late")
+    print(f"phase-locked drift        {drift:+.9f} s over {fires} fires")
+    print(f"restart-on-observe drift  {old_drift:+.3f} s")
+
+    failures = check_policies(args.interval)
+    if fires != args.cycles or abs(drift) > TOLERANCE:
+        failures.append("drift")
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
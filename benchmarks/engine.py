@@ -0,0 +1,201 @@
+"""
+Benchmarks the scheduler, key dispatch and audio hot paths with fake devices.
+
+For each timer count, runs that many timers for a while under a storm of synthetic key
+presses and reports tick cost, trigger lateness, key-to-reset latency, scheduler wakeups
+per second and memory per timer. Results are printed and saved as JSON under
+benchmarks/results/ so runs can be compared over time.
+
+    python benchmarks/engine.py [--sizes 10 1000 100000] [--seconds 3] [--key-rate 200]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from fakes import ROOT, SOUND_PATH, FakeCard, FakeListener, install_fakes
+import Timer as timer_module
+from InputHub import InputHub
+from TimerManager import TimerManager
+
+KEYS = [f"'{c}'" for c in "abcdefghijklmnopqrstuvwxyz"]
+# One timer in this many is bound to a key. sound_time is below the shortest interval so
+# the repeat gate never delays a first play and lateness is purely scheduling delay.
+KEY_BOUND_EVERY = 4
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pick(percent):
+        return values[min(len(values) - 1, int(len(values) * percent / 100))] * 1000
+
+    return {"count": len(values), "p50_ms": pick(50), "p90_ms": pick(90), "p99_ms": pick(99),
+            "max_ms": values[-1] * 1000}
+
+
+class Instruments:
+    """Wraps timer methods in place to time ticks and record lateness and key latency."""
+
+    def __init__(self):
+        self.tick_times = []
+        self.lateness = []
+        self.key_latency = []
+        self.pressed_at = {}
+
+    def attach(self, timer):
+        check_and_run = timer.checkAndRun
+        play_sound = timer.play_sound
+        reset = timer.reset
+
+        def timed_check_and_run():
+            started = time.perf_counter()
+            check_and_run()
+            self.tick_times.append(time.perf_counter() - started)
+
+        recorded_deadline = [None]
+
+        def recorded_play_sound():
+            # Only the first play of a trigger is late; repeats until the key is pressed are on purpose
+            deadline = timer.last_trigger + timer.interval
+            if deadline != recorded_deadline[0]:
+                recorded_deadline[0] = deadline
+                self.lateness.append(time.monotonic() - deadline)
+            play_sound()
+
+        def recorded_reset(now=None):
+            pressed = self.pressed_at.get(timer.key)
+            if pressed is not None:
+                self.key_latency.append(time.perf_counter() - pressed)
+            reset(now)
+
+        timer.checkAndRun = timed_check_and_run
+        timer.play_sound = recorded_play_sound
+        timer.reset = recorded_reset
+
+
+def build_timers(count, manager, instruments=None):
+    rng = random.Random(count)
+    timers = []
+    for i in range(count):
+        key = KEYS[i % len(KEYS)] if i % KEY_BOUND_EVERY == 0 else None
+        timer = timer_module.Timer(rng.uniform(0.2, 2.0), FakeCard(), key=key, sound_path=SOUND_PATH,
+                                   sound_time=0.1)
+        if instruments is not None:
+            instruments.attach(timer)
+        timers.append(timer)
+    for i, timer in enumerate(timers):
+        manager.add_timer(timer, i)
+    return timers
+
+
+def measure_memory(count):
+    manager = TimerManager()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    timers = build_timers(count, manager)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del timers
+    return (after - before) / count
+
+
+def key_storm(listener, instruments, rate, stop):
+    interval = 1 / rate
+    while not stop.is_set():
+        key = random.choice(KEYS)
+        instruments.pressed_at[key] = time.perf_counter()
+        listener.press(key)
+        time.sleep(interval)
+
+
+def run_size(count, seconds, key_rate):
+    install_fakes()
+
+    memory_per_timer = measure_memory(count)
+
+    hub = InputHub(listener_factory=FakeListener)
+    manager = TimerManager(hub)
+    instruments = Instruments()
+    build_timers(count, manager, instruments)
+
+    stop = threading.Event()
+    scheduler = threading.Thread(target=manager.run, daemon=True)
+    started = time.monotonic()
+    scheduler.start()
+    # The hub hooks the keyboard once the scheduler has subscribed the key-bound timers
+    while not hub.hooked:
+        time.sleep(0.001)
+    storm = threading.Thread(target=key_storm, args=(hub._listener, instruments, key_rate, stop), daemon=True)
+    storm.start()
+    time.sleep(seconds)
+    stop.set()
+    manager.stop()
+    scheduler.join()
+    storm.join()
+    hub.stop()
+    elapsed = time.monotonic() - started
+    audio = timer_module.audio_engine.stats()
+    timer_module.audio_engine.stop()
+
+    tick_times = instruments.tick_times
+    return {
+        "timers": count,
+        "seconds": elapsed,
+        "memory_per_timer_bytes": memory_per_timer,
+        "ticks": len(tick_times),
+        "tick_cost_us": (sum(tick_times) / len(tick_times) * 1e6) if tick_times else None,
+        "tick_cpu_fraction": sum(tick_times) / elapsed,
+        "wakeups_per_second": manager.wakeups / elapsed,
+        "trigger_lateness": percentiles(instruments.lateness),
+        "key_to_reset": percentiles(instruments.key_latency),
+        "audio": audio,
+        "sound_decodes": timer_module.sound_cache.misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 10_000, 100_000])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--key-rate", type=float, default=200, help="synthetic key presses per second")
+    parser.add_argument("--output", default=None, help="JSON file to write (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'timers':>8} {'B/timer':>8} {'tick us':>8} {'wake/s':>8} "
+          f"{'late p50':>9} {'late p99':>9} {'key p50':>8} {'key p99':>8}")
+    for count in args.sizes:
+        result = run_size(count, args.seconds, args.key_rate)
+        results.append(result)
+        lateness, key = result["trigger_lateness"], result["key_to_reset"]
+        print(f"{count:>8} {result['memory_per_timer_bytes']:>8.0f} {result['tick_cost_us'] or 0:>8.1f} "
+              f"{result['wakeups_per_second']:>8.0f} {lateness.get('p50_ms', 0):>8.2f}ms "
+              f"{lateness.get('p99_ms', 0):>8.2f}ms {key.get('p50_ms', 0):>6.2f}ms {key.get('p99_ms', 0):>6.2f}ms")
+
+    output = args.output
+    if output is None:
+        folder = os.path.join(ROOT, "benchmarks", "results")
+        os.makedirs(folder, exist_ok=True)
+        output = os.path.join(folder, f"engine-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "benchmark": "engine",
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {"seconds": args.seconds, "key_rate": args.key_rate},
+            "results": results,
+        }, f, indent=2)
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
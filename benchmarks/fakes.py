@@ -0,0 +1,119 @@
+"""
+Stand-ins for pygame's mixer, pynput's Listener, win10toast and TimerCard, so the engine can be
+benchmarked on a machine without a sound card, keyboard hook or display.
+
+Importing this also puts the repository root on sys.path, so the benchmarks import
+the app's modules from there; import it before them.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SOUND_PATH = os.path.join(ROOT, "retro.wav")
+
+import Timer as timer_module  # noqa: E402
+from AudioEngine import AudioEngine  # noqa: E402
+from SoundCache import SoundCache  # noqa: E402
+
+
+class FakeChannel:
+    def __init__(self, mixer, index):
+        self._mixer = mixer
+        self._index = index
+
+    def get_busy(self):
+        return self._mixer.busy_until.get(self._index, 0) > time.monotonic()
+
+    def play(self, sound):
+        self._mixer.busy_until[self._index] = time.monotonic() + sound.get_length()
+        self._mixer.plays += 1
+
+    def stop(self):
+        self._mixer.busy_until.pop(self._index, None)
+
+    def set_volume(self, volume):
+        pass
+
+
+class FakeMixer:
+    """Just enough of pygame.mixer for AudioEngine: channels that stay busy for the sound's length."""
+
+    def __init__(self):
+        self.busy_until = {}
+        self.plays = 0
+
+    def set_num_channels(self, count):
+        pass
+
+    def get_init(self):
+        return 44100, -16, 2
+
+    def Channel(self, index):
+        return FakeChannel(self, index)
+
+
+class FakeSound:
+    decodes = 0
+
+    def __init__(self, path=None, trim_seconds=None):
+        FakeSound.decodes += 1
+        self.path = path
+        self.length = 0.05 if trim_seconds is None else min(0.05, trim_seconds)
+
+    def get_length(self):
+        return self.length
+
+
+def fake_sound_bytes(sound):
+    return int(sound.get_length() * 44100) * 4
+
+
+class FakeListener:
+    """Replaces pynput's Listener; call press() to inject a key press."""
+
+    def __init__(self, on_press=None):
+        self.on_press = on_press
+        self.daemon = True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def press(self, key):
+        self.on_press(key)
+
+
+class FakeCard:
+    """Counts status updates instead of drawing them."""
+
+    __slots__ = ('updates', 'status')
+
+    def __init__(self):
+        self.updates = 0
+        self.status = ""
+
+    def update_status(self, value):
+        self.updates += 1
+        self.status = value
+
+
+class FakeToastBackend:
+    """Stands in for win10toast: records each toast and blocks for show_seconds like a real one."""
+
+    def __init__(self, show_seconds=0.0):
+        self.show_seconds = show_seconds
+        self.shown = []
+
+    def show(self, title, message, duration, icon_path=None):
+        self.shown.append((title, message))
+        time.sleep(self.show_seconds)
+
+
+def install_fakes():
+    """Give every Timer an AudioEngine on a FakeMixer and a SoundCache of FakeSounds."""
+    timer_module.audio_engine = AudioEngine(mixer=FakeMixer())
+    timer_module.sound_cache = SoundCache(loader=FakeSound, sizer=fake_sound_bytes)
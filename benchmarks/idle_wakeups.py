@@ -0,0 +1,132 @@
+"""
+Counts wakeups while the app is idle and checks they stay near zero.
+
+Runs a TimerManager on its own thread, an InputHub with a fake keyboard hook and a
+StatusBoard draining into hidden cards on an asyncio loop, then goes through:
+  off       no timer enabled
+  far       one key-bound timer enabled whose deadline is an hour away
+  off again the timer disabled
+and counts scheduler wakeups and status board frames per minute in each phase, and
+whether the keyboard hook is installed. Also times how fast a newly enabled timer is
+picked up. Exits 1 if any idle phase wakes more than --max-per-minute times or the hook
+is installed with nothing bound.
+
+    python benchmarks/idle_wakeups.py [--seconds 10] [--max-per-minute 2]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+from fakes import SOUND_PATH, FakeCard, FakeListener, install_fakes
+import Timer as timer_module
+from InputHub import InputHub
+from StatusBoard import StatusBoard
+from TimerManager import TimerManager
+
+# Left for commands to be applied and the first status to go out before counting
+SETTLE_SECONDS = 0.2
+
+
+class HiddenCard(FakeCard):
+    """A card on another page of the timer list."""
+
+    __slots__ = ()
+
+    def is_visible(self):
+        return False
+
+
+def measure(name, seconds, manager, board, hub):
+    time.sleep(SETTLE_SECONDS)
+    wakeups, flushes = manager.wakeups, board.flushes
+    time.sleep(seconds)
+    per_minute = 60 / seconds
+    result = {
+        'phase': name,
+        'wakeups': (manager.wakeups - wakeups) * per_minute,
+        'frames': (board.flushes - flushes) * per_minute,
+        'hooked': hub.hooked,
+        'parked': manager.parked,
+    }
+    print(f"{name:<10} {result['wakeups']:8.1f} {result['frames']:8.1f}   "
+          f"{'yes' if result['hooked'] else 'no':<7}{'yes' if result['parked'] else 'no'}")
+    return result
+
+
+def rearm_latency(manager):
+    fired = threading.Event()
+    timer = timer_module.Timer(0.05, FakeCard(), sound_path=SOUND_PATH, sound_time=0.01)
+    timer.play_sound = fired.set
+    started = time.perf_counter()
+    manager.add_timers([('rearm', timer)])
+    fired.wait(5)
+    latency = time.perf_counter() - started - 0.05
+    manager.remove_timer('rearm')
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10, help="length of each phase")
+    parser.add_argument("--max-per-minute", type=float, default=2)
+    args = parser.parse_args()
+
+    install_fakes()
+    hub = InputHub(listener_factory=FakeListener)
+    manager = TimerManager(hub)
+    scheduler = threading.Thread(target=manager.run, daemon=True)
+    scheduler.start()
+
+    board = StatusBoard()
+    cards = {}
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(_start_board(board, cards), loop).result()
+
+    print(f"{'phase':<10} {'wakeups':>8} {'frames':>8}   hooked parked   (per minute)")
+    results = [measure('off', args.seconds, manager, board, hub)]
+
+    cards['far'] = HiddenCard()
+    manager.add_timers([('far', timer_module.Timer(3600, board.sink('far'), key="'a'", sound_path=SOUND_PATH))])
+    results.append(measure('far', args.seconds, manager, board, hub))
+
+    manager.remove_timer('far')
+    board.clear('far')
+    results.append(measure('off again', args.seconds, manager, board, hub))
+
+    latency = rearm_latency(manager)
+    print(f"re-arm: a newly enabled 50 ms timer fired {latency * 1000:.2f} ms late")
+
+    manager.stop()
+    scheduler.join()
+    hub.stop()
+    timer_module.audio_engine.stop()
+    board.stop()
+    loop.call_soon_threadsafe(loop.stop)
+
+    failures = []
+    for result in results:
+        if result['wakeups'] > args.max_per_minute or result['frames'] > args.max_per_minute:
+            failures.append(f"{result['phase']}: {result['wakeups']:.1f} wakeups, "
+                            f"{result['frames']:.1f} frames per minute")
+    for result in (results[0], results[2]):
+        if result['hooked']:
+            failures.append(f"{result['phase']}: keyboard hooked with nothing bound")
+        if not result['parked']:
+            failures.append(f"{result['phase']}: scheduler not parked")
+    if not results[1]['hooked']:
+        failures.append("far: keyboard not hooked for a key-bound timer")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+async def _start_board(board, cards):
+    board.start(cards.get)
+
+
+if __name__ == "__main__":
+    main()
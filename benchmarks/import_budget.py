@@ -0,0 +1,72 @@
+"""
+Fails when cold-start imports get slower than a budget or pull in a deferred backend.
+
+Imports everything main.py imports before the page is shown, in a fresh interpreter, and
+checks that the audio, keyboard and notification backends were not loaded along the way.
+The module list is read from main.py's own top-level imports, so it keeps up with them.
+
+    python benchmarks/import_budget.py [budget_seconds]
+
+Exits with status 1 if the budget is exceeded or a deferred module was imported.
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = 2.0
+RUNS = 3
+
+
+def startup_modules():
+    """Modules main.py imports at its top level, in order."""
+    with open(os.path.join(ROOT, 'main.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return tuple(dict.fromkeys(modules))
+
+
+STARTUP_MODULES = startup_modules()
+DEFERRED_MODULES = ('pygame', 'pynput', 'win10toast', 'docutils', 'numpy')
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import {', '.join(STARTUP_MODULES)}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure():
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET
+    results = [measure() for _ in range(RUNS)]
+    best = min(result['seconds'] for result in results)
+    loaded = sorted({module for result in results for module in result['loaded']})
+
+    print(f"Cold-start imports: {best * 1000:.0f} ms (best of {RUNS}, budget {budget * 1000:.0f} ms)")
+    failed = False
+    if best > budget:
+        print("FAIL: over the import-time budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
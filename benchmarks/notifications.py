@@ -0,0 +1,60 @@
+"""
+Floods the notification worker the way overdue key-bound timers do and reports what it did.
+
+Every timer asks for a notification every --repeat seconds, as a key-bound timer does each
+sound_time until its key is pressed, while a fake backend takes --show seconds per toast.
+Prints how many toasts were shown, merged, rate limited and dropped, and checks that the
+process never ran more than one notification thread.
+
+    python benchmarks/notifications.py [--timers 50] [--seconds 5] [--repeat 0.5] [--show 1]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from fakes import FakeToastBackend
+from Notifier import Notifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--repeat", type=float, default=0.5, help="seconds between a timer's notifications")
+    parser.add_argument("--show", type=float, default=1, help="seconds the fake backend blocks per toast")
+    parser.add_argument("--min-interval", type=float, default=5.0, help="per-timer rate limit")
+    args = parser.parse_args()
+
+    backend = FakeToastBackend(show_seconds=args.show)
+    notifier = Notifier(backend, min_interval=args.min_interval)
+    baseline_threads = threading.active_count()
+    peak_threads = baseline_threads
+    requests = 0
+
+    started = time.monotonic()
+    next_round = started
+    while time.monotonic() - started < args.seconds:
+        for i in range(args.timers):
+            notifier.notify(f"Timer {i}", "Key: None", duration=args.show, source=i)
+            requests += 1
+        peak_threads = max(peak_threads, threading.active_count())
+        next_round += args.repeat
+        time.sleep(max(0.0, next_round - time.monotonic()))
+    notifier.stop()
+
+    stats = notifier.stats()
+    print(f"requests      {requests}")
+    for name in ('shown', 'coalesced', 'rate_limited', 'dropped', 'failed', 'pending'):
+        print(f"{name:<13} {stats[name]}")
+    for title, message in backend.shown[:5]:
+        print(f"  {title}: {message[:60]}")
+    extra_threads = peak_threads - baseline_threads
+    print(f"peak extra threads {extra_threads}")
+    if extra_threads > 1:
+        print("FAIL: notifications used more than one thread")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
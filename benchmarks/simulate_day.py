@@ -0,0 +1,106 @@
+"""
+Simulates a day of thousands of timers with scripted key presses on the virtual clock.
+
+Builds a script of --timers timers (a quarter of them bound to keys, the rest periodic)
+and key presses through the day, runs it through Simulation twice and checks that:
+  - both runs produce the same trace, line for line;
+  - every periodic timer fired exactly on start + k * interval;
+  - replaying the first run's own trace reproduces its fires.
+Prints the wall time and writes the trace to benchmarks/results/. Exits 1 on failure.
+
+    python benchmarks/simulate_day.py [--timers 2000] [--hours 24] [--seed 1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from fakes import ROOT
+from Simulation import Simulation
+from Trace import compare_fires
+
+KEYS = [repr(letter) for letter in "abcdefghij"]
+
+
+def build_script(timers, seconds, seed):
+    rng = random.Random(seed)
+    script = []
+    for timer_id in range(timers):
+        key = rng.choice(KEYS) if rng.random() < 0.25 else None
+        script.append({'t': round(rng.uniform(0, 60), 3), 'event': 'add', 'timer': timer_id,
+                       'interval': rng.choice((30, 45, 60, 90, 120, 300, 600)), 'key': key,
+                       'sound_time': 5, 'catch_up': 'skip'})
+    # Each key is pressed every couple of minutes, sometimes after its timers are due
+    for key in KEYS:
+        t = rng.uniform(0, 120)
+        while t < seconds:
+            script.append({'t': round(t, 3), 'event': 'key', 'key': key})
+            t += rng.uniform(30, 240)
+    script.sort(key=lambda event: event['t'])
+    return script
+
+
+def run(script, seconds):
+    simulation = Simulation()
+    started = time.perf_counter()
+    events = simulation.run(script, seconds)
+    return events, time.perf_counter() - started
+
+
+def grid_errors(script, events):
+    added = {event['timer']: event for event in script if event['event'] == 'add' and event['key'] is None}
+    errors = 0
+    for event in events:
+        timer = added.get(event['timer'])
+        if event['event'] == 'fire' and timer is not None:
+            periods = (event['t'] - timer['t']) / timer['interval']
+            if abs(periods - round(periods)) * timer['interval'] > 1e-6:
+                errors += 1
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=2000)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    seconds = args.hours * 3600
+    script = build_script(args.timers, seconds, args.seed)
+    events, elapsed = run(script, seconds)
+    fires = sum(1 for event in events if event['event'] == 'fire')
+    resets = sum(1 for event in events if event['event'] == 'reset')
+    print(f"{args.timers} timers over {args.hours:g} h, {len(script) - args.timers} key presses: "
+          f"{fires} fires, {resets} resets in {elapsed:.2f} s wall "
+          f"({seconds / elapsed:,.0f}x real time)")
+
+    failures = []
+    again, _ = run(script, seconds)
+    if again != events:
+        failures.append("second run produced a different trace")
+    errors = grid_errors(script, events)
+    if errors:
+        failures.append(f"{errors} periodic fires off their grid")
+    replayed, _ = run(events, seconds)
+    differences = compare_fires(events, replayed, tolerance=1e-6)
+    if differences:
+        failures.append(f"replaying the trace differs: {differences[0]}")
+
+    os.makedirs(os.path.join(ROOT, "benchmarks", "results"), exist_ok=True)
+    path = os.path.join(ROOT, "benchmarks", "results", f"simulate_day-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+    print(f"trace written to {path}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
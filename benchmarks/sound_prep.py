@@ -0,0 +1,72 @@
+"""
+Compares loading a sound straight from its file with loading it through the PCM cache.
+
+Generates a --seconds long WAV at a different rate from the mixer's, so loading it
+needs a resample, and times: pygame decoding the file, the first PcmCache load (which
+transcodes it), later loads (memory-mapped from the cache), and a load of a file past
+the streaming threshold (no decode).
+
+    python benchmarks/sound_prep.py [--seconds 60]
+"""
+import argparse
+import math
+import os
+import struct
+import tempfile
+import time
+import wave
+
+import fakes  # noqa: F401 - puts the repository root on sys.path
+from AudioEngine import get_mixer
+from PcmCache import PcmCache
+
+
+def write_tone(path, seconds, rate=22050):
+    frame = [struct.pack('<h', int(8000 * math.sin(2 * math.pi * 440 * i / rate))) for i in range(rate)]
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        second = b''.join(frame)
+        for _ in range(int(seconds)):
+            f.writeframes(second)
+
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "tone.wav")
+        write_tone(path, args.seconds)
+        # Only decoding is timed, so a machine without a sound card can run this too
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        mixer = get_mixer()
+        cache = PcmCache(os.path.join(folder, "pcm"), stream_after=args.seconds + 1)
+
+        direct_ms, sound = timed(lambda: mixer.Sound(path))
+        cold_ms, _ = timed(lambda: cache.load(path), repeat=1)
+        warm_ms, _ = timed(lambda: cache.load(path))
+        cache.stream_after = args.seconds - 1
+        stream_ms, streamed = timed(lambda: cache.load(path))
+
+        print(f"{args.seconds:g} s sound, {len(sound.get_raw()) / 1e6:.1f} MB decoded")
+        print(f"decode from file      {direct_ms:8.1f} ms")
+        print(f"first cache load      {cold_ms:8.1f} ms (transcode + write)")
+        print(f"cached load (mmap)    {warm_ms:8.1f} ms")
+        print(f"streamed (no decode)  {stream_ms:8.1f} ms -> {type(streamed).__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares TimerStore against one Python object per timer.
+
+Reports memory per timer and the cost of one expiry pass over every timer at 10, 1k and
+100k timers. The object baseline carries the same scheduling fields as Timer, without the
+sound, so the numbers only reflect timer bookkeeping.
+
+    python benchmarks/timer_store.py
+"""
+import time
+import tracemalloc
+
+import fakes  # noqa: F401 - puts the repository root on sys.path
+from TimerStore import TimerStore, np
+
+SIZES = (10, 1_000, 100_000)
+
+
+class ObjectTimer:
+    def __init__(self, interval, sound_time, key, now):
+        self.interval = interval
+        self.key = key
+        self.timer_name = "Generic Timer"
+        self.sound_path = None
+        self.last_trigger = now
+        self.sound_time = sound_time
+        self.use_notification = False
+        self.last_sound = now
+        self.volume = 1
+        self.last_status_update = now
+        self.running = True
+
+    def check(self, now):
+        if self.running and now - self.last_trigger >= self.interval and now - self.last_sound >= self.sound_time:
+            self.last_sound = now
+            if self.key is None:
+                self.last_trigger = now
+            return True
+        return False
+
+
+def build_objects(count, now):
+    return [ObjectTimer(1 + i % 600, 5, None, now) for i in range(count)]
+
+
+def build_store(count, now):
+    store = TimerStore(capacity=count)
+    handles = [store.add(1 + i % 600, 5, start=now) for i in range(count)]
+    return store, handles
+
+
+def measure_memory(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(count, time.monotonic())
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return (after - before) / count
+
+
+def measure_tick(tick, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tick()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    print(f"numpy: {'yes' if np is not None else 'no (array fallback)'}")
+    print(f"{'timers':>8} {'obj B/timer':>12} {'store B/timer':>14} {'obj tick ms':>12} {'store tick ms':>14}")
+    for count in SIZES:
+        now = time.monotonic()
+        objects = build_objects(count, now)
+        store, _ = build_store(count, now)
+        object_tick = measure_tick(lambda: [t.check(time.monotonic()) for t in objects])
+        store_tick = measure_tick(store.checkAndRun)
+        print(f"{count:>8} {measure_memory(build_objects, count):>12.0f} "
+              f"{measure_memory(build_store, count):>14.0f} "
+              f"{object_tick * 1000:>12.3f} {store_tick * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
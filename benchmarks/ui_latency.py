@@ -0,0 +1,134 @@
+"""
+Measures how long UI handlers take while the scheduler is busy.
+
+Runs an asyncio loop, standing in for NiceGUI's, next to a TimerManager ticking --timers
+short timers whose status updates cost --status-us each. Every few milliseconds the loop
+calls what the UI's handlers call (reset, disable, enable, reset a group) and times each
+call, along with how late the loop itself wakes up. Exits 1 if the handlers' p99 is over
+--budget-ms, or if the loop's p99 lag right after a group reset (every timer rescheduled
+at once) is over --lag-budget-ms.
+
+Some delay is unavoidable: the scheduler thread holds the GIL for up to
+sys.getswitchinterval() (5 ms by default) at a time.
+
+    python benchmarks/ui_latency.py [--timers 10000] [--seconds 5] [--status-us 50]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+
+from fakes import SOUND_PATH, FakeListener, install_fakes
+import Timer as timer_module
+from InputHub import InputHub
+from TimerManager import TimerManager
+from engine import percentiles
+
+
+class SlowCard:
+    """A card whose status update takes a while, like a UI label update used to."""
+
+    def __init__(self, cost):
+        self.cost = cost
+
+    def update_status(self, value):
+        end = time.perf_counter() + self.cost
+        while time.perf_counter() < end:
+            pass
+
+
+def make_timer(rng, status_cost):
+    return timer_module.Timer(rng.uniform(0.1, 1.0), SlowCard(status_cost), key="'a'" if rng.random() < 0.25 else None,
+                              sound_path=SOUND_PATH, sound_time=0.05)
+
+
+async def drive_handlers(manager, timer_ids, rng, status_cost, seconds, period):
+    handler_times = {"reset": [], "disable": [], "enable": [], "reset group": []}
+    loop_lag = []
+    # Lag of the wakeups that follow a group reset, while the scheduler reschedules them all
+    bulk_lag = []
+    action = None
+    disabled = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        expected = time.perf_counter() + period
+        await asyncio.sleep(period)
+        loop_lag.append(time.perf_counter() - expected)
+        if action == "reset group":
+            bulk_lag.append(loop_lag[-1])
+
+        action = rng.choice(list(handler_times))
+        started = time.perf_counter()
+        if action == "reset":
+            manager.manual_reset(rng.choice(timer_ids))
+        elif action == "disable":
+            timer_id = rng.choice(timer_ids)
+            manager.remove_timer(timer_id)
+            disabled.append(timer_id)
+        elif action == "enable" and disabled:
+            manager.add_timer(make_timer(rng, status_cost), disabled.pop(), group="stress")
+        else:
+            manager.reset_group("stress")
+        handler_times[action].append(time.perf_counter() - started)
+    return handler_times, loop_lag, bulk_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--status-us", type=float, default=50, help="cost of one status update")
+    parser.add_argument("--period-ms", type=float, default=5, help="time between handler calls")
+    parser.add_argument("--budget-ms", type=float, default=10, help="allowed p99 handler time")
+    parser.add_argument("--lag-budget-ms", type=float, default=50,
+                        help="allowed p99 loop lag right after a group reset")
+    args = parser.parse_args()
+
+    install_fakes()
+    rng = random.Random(1)
+    status_cost = args.status_us / 1e6
+
+    manager = TimerManager(InputHub(listener_factory=FakeListener))
+    timer_ids = list(range(args.timers))
+    manager.add_timers([(timer_id, make_timer(rng, status_cost)) for timer_id in timer_ids], group="stress")
+    scheduler = threading.Thread(target=manager.run, daemon=True)
+    scheduler.start()
+
+    handler_times, loop_lag, bulk_lag = asyncio.run(
+        drive_handlers(manager, timer_ids, rng, status_cost, args.seconds, args.period_ms / 1000))
+    manager.stop()
+    scheduler.join()
+    manager.input_hub.stop()
+    timer_module.audio_engine.stop()
+
+    print(f"{args.timers} timers, {args.status_us:g} us per status update, {manager.wakeups} scheduler wakeups")
+    print(f"{'handler':<12} {'calls':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    all_times = []
+    for action, times in handler_times.items():
+        all_times += times
+        stats = percentiles(times)
+        print(f"{action:<12} {stats['count']:>6} {stats.get('p50_ms', 0):>8.3f} {stats.get('p99_ms', 0):>8.3f} "
+              f"{stats.get('max_ms', 0):>8.3f}")
+    for label, lags in (("loop lag", loop_lag), ("bulk lag", bulk_lag)):
+        lag = percentiles(lags)
+        print(f"{label:<12} {lag['count']:>6} {lag.get('p50_ms', 0):>8.3f} {lag.get('p99_ms', 0):>8.3f} "
+              f"{lag.get('max_ms', 0):>8.3f}")
+
+    failed = False
+    overall = percentiles(all_times)
+    if overall.get("p99_ms", 0) > args.budget_ms:
+        print(f"FAIL: handler p99 {overall['p99_ms']:.2f} ms is over the {args.budget_ms:g} ms budget")
+        failed = True
+    bulk = percentiles(bulk_lag)
+    if bulk.get("p99_ms", 0) > args.lag_budget_ms:
+        print(f"FAIL: loop lag p99 after a group reset {bulk['p99_ms']:.2f} ms is over the "
+              f"{args.lag_budget_ms:g} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Runs the saved timers without the web UI.
+
+    python headless.py [--status stdout|null] [--report-every SECONDS] [--folder PATH] [--record-trace PATH]
+
+Loads the timers saved by the UI, starts every one of them with its bound key and sound,
+and prints the process' resident memory and CPU use every --report-every seconds.
+--record-trace writes every addition, removal, reset and fire to a trace that
+simulate.py can replay. Stop it with Ctrl+C.
+"""
+import argparse
+import time
+
+from Engine import Engine, process_usage
+from StatusBoard import NullStatus, PrintStatus
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run saved timers without the web UI.")
+    parser.add_argument('--status', choices=('stdout', 'null'), default='stdout',
+                        help="where timer status goes (default: stdout)")
+    parser.add_argument('--report-every', type=float, default=60,
+                        help="seconds between resource usage reports, 0 to disable (default: 60)")
+    parser.add_argument('--folder', default=None,
+                        help="timers folder (default: Documents/timers)")
+    parser.add_argument('--record-trace', default=None, metavar='PATH',
+                        help="record a trace of the session for simulate.py")
+    return parser.parse_args()
+
+
+def report_usage(started_cpu, started_at):
+    rss, cpu = process_usage()
+    elapsed = time.monotonic() - started_at
+    used = cpu - started_cpu
+    rss_text = f"{rss / (1024 * 1024):.1f} MB" if rss is not None else "unknown"
+    print(f"[usage] rss {rss_text}, cpu {used:.2f} s over {elapsed:.0f} s "
+          f"({100 * used / max(elapsed, 1e-9):.2f}%)", flush=True)
+
+
+def main():
+    args = parse_args()
+    engine = Engine(args.folder)
+    if args.record_trace:
+        engine.record_trace(args.record_trace)
+
+    # Timers are registered per group in one batch each, so a group starts in step
+    by_group = {}
+    for timer_id, data in engine.storage.load().items():
+        if data.get("interval") is None or data["interval"] <= 0:
+            print(f"Skipping {data.get('name')!r}: interval is {data.get('interval')!r}")
+            continue
+        name = data.get("name") or timer_id
+        sink = PrintStatus(name) if args.status == 'stdout' else NullStatus()
+        try:
+            timer = engine.timer_from_config(data, sink, uid=timer_id)
+        except Exception as e:
+            print(f"Failed to start {name!r}: {e}")
+            continue
+        by_group.setdefault(data.get("group") or None, []).append((timer_id, timer))
+    started = 0
+    for group, group_timers in by_group.items():
+        engine.manager.add_timers(group_timers, group=group)
+        started += len(group_timers)
+    for error in engine.storage.errors:
+        print(error)
+    print(f"Running {started} timers, Ctrl+C to stop", flush=True)
+
+    engine.start()
+    started_at, started_cpu = time.monotonic(), process_usage()[1]
+    try:
+        while True:
+            if args.report_every > 0:
+                time.sleep(args.report_every)
+                report_usage(started_cpu, started_at)
+            else:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        report_usage(started_cpu, started_at)
+        engine.stop()
+
+
+if __name__ == '__main__':
+    main()
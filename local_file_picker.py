@@ -1,14 +1,67 @@
+import asyncio
+import os
 import platform
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
-from nicegui import events, ui
+from nicegui import events, run, ui
+
+# Rows sent to the grid per message; the rest follow in further messages
+PAGE_SIZE = 500
+AUDIO_SUFFIXES = ('.wav', '.mp3')
+
+
+class DirectoryCache:
+    """Recently listed directories, reused until the directory's mtime changes."""
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def list(self, path: Path) -> list:
+        """Return (name, path, is_dir) for every entry in path, directories first."""
+        key = str(path)
+        mtime = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        entries = scan_directory(key)
+        with self._lock:
+            self._entries[key] = (mtime, entries)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entries
+
+
+def scan_directory(path: str) -> list:
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # Uses the type scandir already read, so no extra stat per entry
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, entry.path, is_dir))
+    entries.sort(key=lambda e: (not e[2], e[0].lower()))
+    return entries
+
+
+directory_cache = DirectoryCache()
 
 
 class local_file_picker(ui.dialog):
 
     def __init__(self, directory: str, *,
-                 upper_limit: Optional[str] = ..., multiple: bool = False, show_hidden_files: bool = False) -> None:
+                 upper_limit: Optional[str] = ..., multiple: bool = False, show_hidden_files: bool = False,
+                 audio_only: bool = False) -> None:
         """Local File Picker
 
         This is a simple file picker that allows you to select a file from the local filesystem where NiceGUI is running.
@@ -17,6 +70,7 @@ class local_file_picker(ui.dialog):
         :param upper_limit: The directory to stop at (None: no limit, default: same as the starting directory).
         :param multiple: Whether to allow multiple files to be selected.
         :param show_hidden_files: Whether to show hidden files.
+        :param audio_only: Whether to list only directories and .wav/.mp3 files.
         """
         super().__init__()
 
@@ -26,6 +80,8 @@ class local_file_picker(ui.dialog):
         else:
             self.upper_limit = Path(directory if upper_limit == ... else upper_limit).expanduser()
         self.show_hidden_files = show_hidden_files
+        self.audio_only = audio_only
+        self._listing = 0
 
         with self, ui.card():
             self.add_drives_toggle()
@@ -36,7 +92,7 @@ class local_file_picker(ui.dialog):
             with ui.row().classes('w-full justify-end'):
                 ui.button('Cancel', on_click=self.close).props('outline')
                 ui.button('Ok', on_click=self._handle_ok)
-        self.update_grid()
+        ui.timer(0, self.update_grid, once=True)
 
     def add_drives_toggle(self):
         if platform.system() == 'Windows':
@@ -44,36 +100,55 @@ class local_file_picker(ui.dialog):
             drives = win32api.GetLogicalDriveStrings().split('\000')[:-1]
             self.drives_toggle = ui.toggle(drives, value=drives[0], on_change=self.update_drive)
 
-    def update_drive(self):
+    async def update_drive(self):
         self.path = Path(self.drives_toggle.value).expanduser()
-        self.update_grid()
-
-    def update_grid(self) -> None:
-        paths = list(self.path.glob('*'))
-        if not self.show_hidden_files:
-            paths = [p for p in paths if not p.name.startswith('.')]
-        paths.sort(key=lambda p: p.name.lower())
-        paths.sort(key=lambda p: not p.is_dir())
-
-        self.grid.options['rowData'] = [
-            {
-                'name': f'📁 <strong>{p.name}</strong>' if p.is_dir() else p.name,
-                'path': str(p),
-            }
-            for p in paths
-        ]
+        await self.update_grid()
+
+    def list_rows(self, path: Path) -> list:
+        rows = []
+        for name, entry_path, is_dir in directory_cache.list(path):
+            if not self.show_hidden_files and name.startswith('.'):
+                continue
+            if self.audio_only and not is_dir and not name.lower().endswith(AUDIO_SUFFIXES):
+                continue
+            rows.append({
+                'name': f'📁 <strong>{name}</strong>' if is_dir else name,
+                'path': entry_path,
+                'is_dir': is_dir,
+            })
+        return rows
+
+    async def update_grid(self) -> None:
+        self._listing += 1
+        listing = self._listing
+        try:
+            # Listing large directories is slow, so it runs on a worker thread
+            rows = await run.io_bound(self.list_rows, self.path)
+        except OSError as e:
+            ui.notify(f'Cannot open {self.path}: {e.strerror}')
+            return
+        if listing != self._listing:
+            return  # Another directory was opened in the meantime
+
         if (self.upper_limit is None and self.path != self.path.parent) or \
                 (self.upper_limit is not None and self.path != self.upper_limit):
-            self.grid.options['rowData'].insert(0, {
+            rows.insert(0, {
                 'name': '📁 <strong>..</strong>',
                 'path': str(self.path.parent),
+                'is_dir': True,
             })
+        self.grid.options['rowData'] = rows[:PAGE_SIZE]
         self.grid.update()
+        for start in range(PAGE_SIZE, len(rows), PAGE_SIZE):
+            await asyncio.sleep(0)
+            if listing != self._listing:
+                return
+            self.grid.run_grid_method('applyTransaction', {'add': rows[start:start + PAGE_SIZE]})
 
-    def handle_double_click(self, e: events.GenericEventArguments) -> None:
+    async def handle_double_click(self, e: events.GenericEventArguments) -> None:
         self.path = Path(e.args['data']['path'])
-        if self.path.is_dir():
-            self.update_grid()
+        if e.args['data'].get('is_dir', self.path.is_dir()):
+            await self.update_grid()
         else:
             self.submit([str(self.path)])
 
@@ -1,17 +1,27 @@
-import json
+import sys
 import time
-import pygame
-from pynput.keyboard import Listener, Key, KeyCode
-from win10toast import ToastNotifier
+from types import SimpleNamespace
 
-from TimerDisplay import TimerCard
-from nicegui import ui, app
-import threading
-from TimerManager import TimerManager
-from pathlib import Path
-import os
+from StartupProfiler import ImportProfiler
+
+# python main.py --profile-startup prints what every module cost to import
+import_profiler = ImportProfiler.start() if '--profile-startup' in sys.argv else None
 
-pygame.mixer.init()
+from TimerDisplay import TimerCard
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+from nicegui import ui, app, run
+from ControlApi import ControlApi
+from Engine import Engine
+from InputHub import string_to_key
+from Metrics import DESCRIPTIONS, metrics
+from Profiler import profiler
+from SoundCache import sound_cache
+from Timer import resource_path
+from TimerList import TimerList
+from TimerLoader import StartupReport, TimerLoader
+
+startup_report = StartupReport()
 
 # Remove margin/padding from body for cleaner layout
 # Counter for unique card IDs
@@ -22,31 +32,21 @@ dark.enable()
 # Remove margin/padding from body for cleaner layout
 ui.query('body').classes('m-0 p-0')
 
-toaster = ToastNotifier()
 useWindows = False
+# How often card status labels are refreshed in the browser
+STATUS_FPS = 4
+
+# python main.py --metrics records latency histograms from startup instead of from the stats panel
+metrics.enabled = '--metrics' in sys.argv
 
-def get_documents_timers_folder():
-    # Find user documents folder
-    if os.name == 'nt':
-        documents_folder = Path(os.environ['USERPROFILE']) / 'Documents'
-    else:
-        documents_folder = Path.home() / 'Documents'
-    timers_folder = documents_folder / 'timers'
-    timers_folder.mkdir(parents=True, exist_ok=True)
-    return timers_folder
-
-
-def read_all_timers_from_folder():
-    timers_folder = get_documents_timers_folder()
-    timer_data_list = []
-    for file in timers_folder.glob("*.json"):
-        try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                timer_data_list.append(data)
-        except Exception as e:
-            print(f"Failed to read {file}: {e}")
-    return timer_data_list
+# The UI is a layer on top of the engine, which can also run headless (see headless.py).
+# python main.py --asyncio-engine schedules timers on NiceGUI's event loop instead of a thread.
+engine = Engine(use_asyncio='--asyncio-engine' in sys.argv)
+if engine.use_asyncio:
+    app.on_startup(engine.start)
+else:
+    engine.start()
+storage = engine.storage
 
 def toggle_toasts():
     global useWindows
@@ -58,139 +58,315 @@ with ui.row().classes('p-4'):
     ui.button('Save Timers', on_click=lambda: save_timers())
     ui.button('Toggle All On', on_click=lambda: toggle_all())
     ui.switch(text="windows notifications", value=useWindows, on_change=toggle_toasts)
-# A grid that grows vertically with content
-grid = ui.grid(columns=2).classes('w-full gap-4 p-4')  # no height restriction
+    group_input = ui.input(label="Group").classes('w-32')
+    ui.button('Start Group', on_click=lambda: start_group(group_input.value))
+    ui.button('Stop Group', on_click=lambda: stop_group(group_input.value))
 
-manager = TimerManager()
-manager_thread = threading.Thread(target=manager.run, daemon=True)
-manager_thread.start()
-last_keypress = None
-timers = []
 
-def on_press(key):
-    global last_keypress
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f} ms"
+
+
+def refresh_stats():
+    summary = metrics.summary()
+    for name, label in stats_labels.items():
+        stats = summary.get(name)
+        if stats is None:
+            label.set_text(f"{name}: no samples")
+        else:
+            label.set_text(f"{name}: p50 {format_ms(stats['p50'])}, p99 {format_ms(stats['p99'])}, "
+                           f"max {format_ms(stats['max'])} ({stats['count']} samples)")
+
+
+stats_timer = None
+
+
+def set_recording(value):
+    # The panel only has a refresh timer while recording; an inactive ui.timer would
+    # still wake the event loop every second
+    global stats_timer
+    metrics.enabled = value
+    if value and stats_timer is None:
+        with stats_panel:
+            stats_timer = ui.timer(1, refresh_stats)
+    elif not value and stats_timer is not None:
+        stats_timer.cancel()
+        stats_timer = None
+    refresh_stats()
+
+
+# Live latency stats; the same histograms are served to Prometheus at /metrics
+with ui.expansion('Latency stats').classes('px-4 w-full') as stats_panel:
+    with ui.row().classes('items-center'):
+        ui.switch(text="record", value=metrics.enabled, on_change=lambda e: set_recording(e.value))
+        ui.button('Clear', on_click=lambda: (metrics.reset(), refresh_stats())).props('flat')
+    stats_labels = {name: ui.label().classes('text-sm font-mono') for name in DESCRIPTIONS}
+    with ui.row().classes('items-center'):
+        profile_seconds = ui.number(label="Profile seconds", value=10, min=1, max=300).classes('w-32')
+        ui.button('Capture profile', on_click=lambda: capture_profile(profile_seconds.value)).props('flat')
+    profile_label = ui.label().classes('text-sm font-mono whitespace-pre')
+set_recording(metrics.enabled)
+
+
+MAX_PROFILE_SECONDS = 300
+
+
+def describe_profile(summary):
+    lines = [f"{summary['path']} ({summary['samples']} samples over {summary['seconds']:.1f} s)"]
+    for thread in summary['threads']:
+        if thread['cpu_seconds']:
+            lines.append(f"  {thread['name']}: {thread['cpu_seconds']:.3f} s CPU ({thread['cpu_percent']:.1f}%)")
+    for span in summary['spans']:
+        lines.append(f"  {span['name']} on {span['thread']}: {span['count']} x {format_ms(span['mean_seconds'])}, "
+                     f"max {format_ms(span['max_seconds'])}")
+    return "\n".join(lines)
+
+
+async def capture_profile(seconds):
+    seconds = min(max(float(seconds or 10), 1), MAX_PROFILE_SECONDS)
+    profile_label.set_text(f"Profiling for {seconds:g} s...")
     try:
-        last_keypress = key
-    except AttributeError:
-        time.sleep(.05)
+        summary = await run.io_bound(profiler.capture, seconds)
+    except RuntimeError as e:
+        ui.notify(str(e))
+        return
+    profile_label.set_text(describe_profile(summary))
+    ui.notify(f"Profile written to {summary['path']}")
+
 
+@app.get('/metrics')
+def metrics_endpoint():
+    return PlainTextResponse(metrics.prometheus_text(), media_type='text/plain; version=0.0.4')
 
-def start_listener():
-    # Set up the listener
-    with Listener(on_press=on_press) as listener:
-        listener.join()
+
+# Samples every thread for the given seconds; the collapsed stacks are written to disk
+@app.post('/profile')
+async def profile_endpoint(seconds: float = 10):
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=422, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+    try:
+        return await run.io_bound(profiler.capture, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
-# Create and start the thread for the listener
-listener_thread = threading.Thread(target=start_listener)
-listener_thread.start()
+# Full cards are only built for the current page of timers
+CARDS_PER_PAGE = 20
+
+input_hub = engine.input_hub
+manager = engine.manager
+timers = []
+status_board = engine.status_board
+# Cards brought on screen may have countdowns for the status board to start rendering
+timer_list = TimerList(timers, page_size=CARDS_PER_PAGE, on_page=status_board.refresh)
+cards_by_id = {}
+status_board.attach(cards_by_id.get, fps=STATUS_FPS)
 
 
 def add_timer():
     global card_counter
     # Generate a unique Python ID
     card_counter += 1
-    timers.append(TimerCard(card_counter, grid, get_last_keypress, set_last_keypress,
-                            on_remove=lambda e: on_remove(e), on_enable=on_enable,
-                            on_disable=on_disable, manual_reset=manual_reset))
-
-def get_last_keypress():
-    return last_keypress
-
-
-def set_last_keypress(key):
-    global last_keypress
-    last_keypress = key
+    card = TimerCard(card_counter, None, input_hub,
+                     on_remove=lambda e: on_remove(e), on_enable=on_enable,
+                     on_disable=on_disable, manual_reset=manual_reset,
+                     on_update=timer_list.card_updated)
+    cards_by_id[card_counter] = card
+    timer_list.add(card)
 
 
 def on_remove(card):
-    manager.remove_timer(card.get_timer)
+    manager.remove_timer(card.card_id)
+    cards_by_id.pop(card.card_id, None)
+    timer_list.remove(card)
 
 
 def on_disable(card, card_id):
-    card.update_status("")
     manager.remove_timer(card_id)
+    status_board.clear(card_id)
 
 def manual_reset(timer_id):
     manager.manual_reset(timer_id)
 
-def on_enable(card, card_id):
-    timer = card.get_timer(toaster, useWindows)
+async def on_enable(card, card_id):
+    if not card.validate():
+        return False
+    # Decoded off the event loop, as start_cards does for a batch
+    failed = await run.io_bound(sound_cache.prewarm, [(sound_of(card), card.trim_seconds())])
+    for path, error in failed:
+        ui.notify(f"Could not load {path}: {error}", type='warning')
+    if failed:
+        return False
+    if not card.enabled:
+        return True  # switched back off while the sound was loading
+    timer = card.get_timer(useWindows, status_board.sink(card_id))
     if timer is None:
         return False
 
-    manager.add_timer(timer, card_id)
+    manager.add_timer(timer, card_id, group=card.group or None)
     return True
 
 
-def string_to_key(key_str):
-    """
-    Converts a string like 'Key.enter', 'a', or "'g'" to the appropriate Key or KeyCode.
-    Returns:
-        - Key for special keys
-        - KeyCode for regular keys
-        - None if invalid
-    """
-    if key_str is None:
-        return None
-
-    # Remove surrounding quotes if present
-    if (isinstance(key_str, str) and
-            ((key_str.startswith("'") and key_str.endswith("'")) or
-             (key_str.startswith('"') and key_str.endswith('"')))):
-        key_str = key_str[1:-1]
-
-    if key_str.startswith('Key.'):
-        member_name = key_str.split('.', 1)[1]
-        try:
-            return getattr(Key, member_name)
-        except AttributeError:
-            return None  # Invalid key string
-    elif len(key_str) == 1:
-        # Match pynput's KeyCode(char=...)
-        return KeyCode(char=key_str)
-    else:
-        return None  # Unrecognized
-
-
-# Loads existing timers from the folder
-for timer_data in read_all_timers_from_folder():
+def sound_of(card):
+    return card.file_path or resource_path("retro.wav")
+
+
+async def start_cards(cards, notify=ui.notify):
+    """Enable many cards as one batch: sounds decoded up front, then one registration."""
+    cards = [card for card in cards if not card.enabled]
+    if not cards:
+        return
+    # Decoding off the event loop keeps the page responsive while a large group warms up
+    failed = await run.io_bound(sound_cache.prewarm, [(sound_of(card), card.trim_seconds()) for card in cards])
+    for path, error in failed:
+        notify(f"Could not load {path}: {error}", type='warning')
+    failed_paths = {path for path, _ in failed}
+
+    started = []
+    for card in cards:
+        # Skip cards switched on by hand while the sounds were loading
+        if card.enabled or sound_of(card) in failed_paths:
+            continue
+        timer = card.get_timer(useWindows, status_board.sink(card.card_id))
+        if timer is not None:
+            started.append((card, timer))
+    by_group = {}
+    for card, timer in started:
+        by_group.setdefault(card.group or None, []).append((card.card_id, timer))
+    for group, group_timers in by_group.items():
+        manager.add_timers(group_timers, group=group)
+    for card, _ in started:
+        card.mark_enabled(True)
+
+
+async def start_group(group):
+    group = (group or "").strip()
+    cards = [card for card in timers if card.group == group] if group else []
+    if not cards:
+        ui.notify(f"No timers in group {group!r}")
+        return
+    await start_cards(cards)
+
+
+def stop_group(group):
+    for card_id in manager.stop_group((group or "").strip()):
+        status_board.clear(card_id)
+        card = cards_by_id.get(card_id)
+        if card is not None:
+            card.mark_enabled(False)
+
+
+# Control API for scripts and overlays; ids are the cards' saved uids
+def cards_for(uids):
+    by_uid = {card.uid: card for card in timers}
+    return [by_uid[uid] for uid in uids if uid in by_uid]
+
+
+def api_reset(uids):
+    manager.reset_many([card.card_id for card in cards_for(uids) if card.enabled])
+
+
+async def api_enable(uids):
+    # Cards that would fail validation are reported here, as there is no page to show a notification on
+    cards = []
+    for card in cards_for(uids):
+        problem = card.problem()
+        if problem is None:
+            cards.append(card)
+        else:
+            print(f"Not enabling timer {card.uid}: {problem}")
+    await start_cards(cards, notify=lambda message, **kwargs: print(message))
+
+
+def api_disable(uids):
+    cards = [card for card in cards_for(uids) if card.enabled]
+    manager.remove_timers([card.card_id for card in cards])
+    for card in cards:
+        status_board.clear(card.card_id)
+        card.mark_enabled(False)
+
+
+def api_create(specs):
+    global card_counter
+    uids = []
+    for spec in specs:
+        card_counter += 1
+        card = TimerCard(card_counter, None, input_hub,
+                         on_remove=lambda e: on_remove(e), on_enable=on_enable,
+                         on_disable=on_disable, manual_reset=manual_reset,
+                         number=spec.interval, volume=spec.volume * 100, key=string_to_key(spec.key),
+                         file_path=spec.file_path, name=spec.name, on_update=timer_list.card_updated,
+                         group=spec.group, trim_sound=spec.trim_sound, catch_up=spec.catch_up)
+        cards_by_id[card_counter] = card
+        timer_list.add(card, refresh=False)
+        uids.append(card.uid)
+    timer_list.refresh()
+    return uids
+
+
+def api_states():
+    now = time.monotonic()
+    running = manager.timers
+    states = {}
+    for card in timers:
+        timer = running.get(card.card_id) if card.enabled else None
+        if timer is None:
+            states[card.uid] = (None, False)
+        else:
+            states[card.uid] = (max(0, round(timer.last_trigger + timer.interval - now)), timer.isTriggered())
+    return states
+
+
+control_api = ControlApi(SimpleNamespace(reset=api_reset, enable=api_enable, disable=api_disable,
+                                         create=api_create, states=api_states))
+control_api.mount(app)
+
+
+def build_saved_card(timer_uid, timer_data):
+    global card_counter
     card_counter += 1
-    timers.append(TimerCard(card_counter, grid, get_last_keypress, set_last_keypress,
-                            on_remove=lambda e: on_remove(e), on_enable=on_enable,
-                            on_disable=on_disable, manual_reset=manual_reset,
-                            number=timer_data.get("interval"), volume=timer_data.get("volume")*100,
-                            key=string_to_key(timer_data.get("key")), file_path=timer_data.get("file_path"),
-                            name=timer_data.get("name")))
+    card = TimerCard(card_counter, None, input_hub,
+                     on_remove=lambda e: on_remove(e), on_enable=on_enable,
+                     on_disable=on_disable, manual_reset=manual_reset,
+                     number=timer_data.get("interval"), volume=timer_data.get("volume")*100,
+                     key=string_to_key(timer_data.get("key")), file_path=timer_data.get("file_path"),
+                     name=timer_data.get("name"), uid=timer_uid, on_update=timer_list.card_updated,
+                     group=timer_data.get("group"), trim_sound=timer_data.get("trim_sound", False),
+                     catch_up=timer_data.get("catch_up", "skip"))
+    cards_by_id[card_counter] = card
+    timer_list.add(card, refresh=False)
+
+
+loader = TimerLoader(storage, build_saved_card, startup_report, on_batch=timer_list.refresh)
+
+
+async def load_saved_timers():
+    # Runs once the first page is on screen, so saved cards fill in after the first paint
+    if "first paint" in startup_report.stages:
+        return
+    startup_report.mark("first paint")
+    if import_profiler is not None:
+        import_profiler.stop()
+        print(import_profiler.report())
+    errors = await loader.run()
+    print(startup_report.summary())
+    with timer_list.grid:
+        for error in errors:
+            print(error)
+            ui.notify(error, type='warning')
+
+app.on_connect(load_saved_timers)
 
 def save_timers():
-    delete_all_in_timers_folder()
-    counter = 0
-    for timer in timers:
-        save_to_timers_folder(f"timer_{counter}.json", timer.to_dict())
-        counter += 1
-
-def toggle_all():
-    for timer in timers:
-        timer.toggle(True)
-
-def save_to_timers_folder(filename, data):
-    timers_folder = get_documents_timers_folder()
-    print("Saved to: " + str(timers_folder.resolve()))
-    file_path = timers_folder / filename
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-
-def delete_all_in_timers_folder():
-    timers_folder = get_documents_timers_folder()
-    for item in timers_folder.iterdir():
-        if item.is_file():
-            item.unlink()
-        elif item.is_dir():
-            import shutil
-            shutil.rmtree(item)
-
+    # Saving before every saved card exists would record the missing ones as deleted
+    if not loader.done:
+        ui.notify("Still loading saved timers, try again in a moment")
+        return
+    changed = storage.save({card.uid: card.to_dict() for card in timers})
+    print(f"Saved {changed} changed timers to: {storage.folder.resolve()}")
+
+async def toggle_all():
+    await start_cards(timers)
 
 
 ui.run(reload=False, title="Aaron's Timer", favicon="⏰")
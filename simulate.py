@@ -0,0 +1,60 @@
+"""
+Runs a timer schedule on a virtual clock, as fast as it can be computed.
+
+    python simulate.py SCRIPT [--until SECONDS] [--out PATH] [--compare TRACE] [--tolerance SECONDS]
+
+SCRIPT is a trace file of JSON lines (see Trace.py), either recorded by a real session
+with `python headless.py --record-trace PATH` or written by hand. Its additions,
+removals, resets and key presses are played back and the resulting trace, fires
+included, is written to --out. --compare checks the fires against another trace, such
+as the recording being replayed, and exits 1 if they differ by more than --tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+
+from Simulation import Simulation
+from Trace import compare_fires, read_trace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a timer schedule on a virtual clock.")
+    parser.add_argument('script', help="trace file to play")
+    parser.add_argument('--until', type=float, default=None,
+                        help="seconds to simulate (default: up to the script's last event)")
+    parser.add_argument('--out', default=None, help="write the resulting trace here")
+    parser.add_argument('--compare', default=None, help="trace whose fires the run must match")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="seconds a fire may differ by in --compare (default: 0.5)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    script = read_trace(args.script)
+    simulation = Simulation()
+    started = time.perf_counter()
+    events = simulation.run(script, args.until)
+    elapsed = time.perf_counter() - started
+    fires = sum(1 for event in events if event['event'] == 'fire')
+    print(f"Simulated {simulation.clock.now:.0f} s with {len(simulation.manager.timers)} timers: "
+          f"{fires} fires in {elapsed:.2f} s")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+    if args.compare:
+        differences = compare_fires(read_trace(args.compare), events, args.tolerance)
+        for line in differences[:20]:
+            print(line)
+        if len(differences) > 20:
+            print(f"... and {len(differences) - 20} more")
+        if differences:
+            sys.exit(1)
+        print("Fires match")
+
+
+if __name__ == '__main__':
+    main()